@@ -1,17 +1,18 @@
+import time
+startup_time = time.perf_counter()
 
+import os
 import sys
+import argparse
 from collections import deque
 
-from PySide6.QtCore import QRectF, Qt, QLineF, QPointF
+from PySide6.QtCore import QRectF, Qt, QLineF, QPointF, QTimer
 from PySide6.QtGui import QAction, QKeySequence, QPainter, QPen, QColor, QBrush, QPolygonF, QPainterPath, QPainterPathStroker
 from PySide6.QtWidgets import QMainWindow, QApplication, QGraphicsScene, QGraphicsView, QGraphicsObject, QGraphicsItem, QStyleOptionGraphicsItem, QWidget
-from sklearn.neighbors import NearestNeighbors
 
 import numpy as np
 import copy
 import math
-import matplotlib.pyplot as plt
-import scipy.stats 
 
 
 import main
@@ -38,11 +39,13 @@ class Vertex(QGraphicsObject):
             self.setZValue(-5)
 
         self.edges = []
+        self.edges_follow = True            # the edges are updated when the vertex moves, see moveVertex
         
         self.setPos(x_coord,y_coord)
 
         self.canMove = True        # default behavior for mouse dragging
         self.setFlag(QGraphicsItem.ItemIsMovable, enabled = self.canMove)
+        self.pinned = False        # pinned vertices keep their place in the force layouts on the current layout, see MainWindow.toggle_pin
 
         self.setFlag(QGraphicsItem.ItemSendsGeometryChanges)
     
@@ -52,8 +55,11 @@ class Vertex(QGraphicsObject):
         x = self.pos().x()
         y = self.pos().y()
 
+        dragged = (x, -y) != (self.x_coord, self.y_coord)
         self.x_coord = x
         self.y_coord = -y
+        if dragged and self.window.pin_dragged_nodes and not self.pinned:
+            self.window.toggle_pin(self)
 
         self.window.update_node_position(self.id, self.x_coord, self.y_coord, index = self.subgraph)
 
@@ -61,11 +67,17 @@ class Vertex(QGraphicsObject):
 
         #print("dragged node",self.id,"to position",self.x_coord,self.y_coord)
 
-        if self.window.dynamic_forces == True and self.window.layout in ["force bfs", "force random", "force custom"]:
+        if self.window.dynamic_forces == True and self.window.layout in ["force bfs", "force random", "force multilevel", "force best", "force pivot mds", "force custom"]:
             self.window.layout = "force custom"
-            print("updating force layout")
-            self.window.regenerate()
+            if self.window.local_relaxation == True:
+                self.window.relax_around_vertex(self)
+            else:
+                print("updating force layout")
+                self.window.regenerate()
         
+    def mouseDoubleClickEvent(self, event):
+        self.window.toggle_pin(self)
+
     def toggleVisibility(self):
         if self.displayed == True:
             self.displayed = False
@@ -89,17 +101,20 @@ class Vertex(QGraphicsObject):
                 edge[0].displayed = False
 
 
-    def moveVertex(self, x, y):
+    def moveVertex(self, x, y, edge_update = True):
         if main.printing_mode:
             print("node", self.id, "is currently at", self.pos())
             print("moving node",self.id,"from",self.x_coord,self.y_coord,"to",x,y)
             
         #print("moving node",self.id,"from",self.x_coord,self.y_coord,"to",x,y)
         
+        self.edges_follow = edge_update         # without edge update, the caller updates the edges once all vertices have moved
         self.setPos(x, y)
+        self.edges_follow = True
         self.x_coord = x
         self.y_coord = -y
-        self.update_edges()
+        if edge_update:
+            self.update_edges()
 
     def addEdge(self, edge_tuple):          # format (edge object, other vertex object)
         self.edges.append(edge_tuple)
@@ -118,7 +133,7 @@ class Vertex(QGraphicsObject):
             painter.setPen(
                 QPen(
                     QColor(self.color).darker(),
-                    2,
+                    4 if self.pinned else 2,
                     Qt.SolidLine,
                     Qt.RoundCap,
                     Qt.RoundJoin,
@@ -148,7 +163,7 @@ class Vertex(QGraphicsObject):
         
     # recalculate edges after change in location
     def itemChange(self, change: QGraphicsItem.GraphicsItemChange, value):
-        if change == QGraphicsItem.ItemPositionHasChanged:
+        if change == QGraphicsItem.ItemPositionHasChanged and self.edges_follow:
         #    print("scenepos",self.scenePos(),"itemChange value", value, "x and y", x, y)
         #    print("scenerect",self.scene().sceneRect.x(),self.scene().sceneRect.y())
             self.update_edges()
@@ -170,7 +185,7 @@ class Edge(QGraphicsItem):
         self.show_dummies = show_dummies
         
         self.directed = directed
-        if main.G.is_directed() == True:
+        if start.window.graph.directed == True:
             self.directed = True
 
         self.start = start
@@ -230,20 +245,13 @@ class Edge(QGraphicsItem):
 
     def calculate_location(self, waypoint_update = False):
         self.prepareGeometryChange()
-        if waypoint_update:
-            #print("calling calculate location for long")
-            starting_point = self.waypoints[0]
-            ending_point = self.waypoints[len(self.waypoints)-1]
-        else:
-            starting_point = self.start.pos() + self.start.boundingRect().center()
-            ending_point = self.end.pos() + self.end.boundingRect().center()
-            self.waypoints[0] = starting_point
-            self.waypoints[len(self.waypoints)-1] = ending_point
+        start_center = self.start.pos() + self.start.boundingRect().center()
+        end_center = self.end.pos() + self.end.boundingRect().center()
+        if not waypoint_update:
+            self.waypoints[0] = start_center
+            self.waypoints[len(self.waypoints)-1] = end_center
         
-        self.line = QLineF(
-            self.start.pos() + self.start.boundingRect().center(),
-            self.end.pos() + self.end.boundingRect().center(),
-        )
+        self.line = QLineF(start_center, end_center)
         if self.segmented == False:
             self.lines = [self.line]
         else:
@@ -270,7 +278,7 @@ class Edge(QGraphicsItem):
         if self.track_drawing:
             print("starting path building")        
         factor = 0.25
-        waypoints_list = copy.deepcopy(self.waypoints)
+        waypoints_list = list(self.waypoints)           # the points are only read
         self.path = QPainterPath(waypoints_list[0])
         if len(waypoints_list) == 2:
             self.path.quadTo(waypoints_list[0], waypoints_list[-1])
@@ -357,7 +365,7 @@ class Edge(QGraphicsItem):
             #self.track_drawing =
             workaround_mode = False          # this shows a segmented layout even when segmentation is turned off, to bypass a weird bug with QT paint
 
-            if self.directed and self.segmented and (self.start.window.check_for_layered_layout() or main.subgraphs_included):                    # directed and segmented and layered
+            if self.directed and self.segmented and (self.start.window.check_for_layered_layout() or self.start.window.graph.subgraphs_included):                    # directed and segmented and layered
                 if self.curved == True:
                     if self.track_drawing:
                         print("directed, segmented, curved")
@@ -380,7 +388,7 @@ class Edge(QGraphicsItem):
                         else:
                             painter.drawLine(line)                    
 
-            elif self.segmented and (self.start.window.check_for_layered_layout() or main.subgraphs_included):                                    # not directed and segmented and layered
+            elif self.segmented and (self.start.window.check_for_layered_layout() or self.start.window.graph.subgraphs_included):                                    # not directed and segmented and layered
                 if self.curved == True:
                     if self.track_drawing:
                         print("non-directed, segmented, curved")
@@ -587,10 +595,13 @@ class VertexBoxes(QGraphicsItem):
 
 
 class MainWindow(QMainWindow):
-    def __init__(self, given_adjacency_dict_list, initial_layout = "random", default_radius = 10) -> None:
+    def __init__(self, graph, initial_layout = "random", default_radius = 10) -> None:
         super().__init__()
         self.setWindowTitle("Graph viewer app")
 
+        self.graph = graph
+        given_adjacency_dict_list = graph.adjacency_dict_list
+
          # Menu
         self.menu = self.menuBar()
         self.file_menu = self.menu.addMenu("File")
@@ -619,7 +630,7 @@ class MainWindow(QMainWindow):
         id_visibility_action.setChecked(False)
         self.actions_menu.addAction(id_visibility_action)
 
-        if main.subgraphs_included:
+        if self.graph.subgraphs_included:
             bounding_box_toggle_action = QAction("Show Subgraph Boundary Box", self)
             bounding_box_toggle_action.setCheckable(True)
             bounding_box_toggle_action.setChecked(True)
@@ -646,7 +657,7 @@ class MainWindow(QMainWindow):
         segmentation_toggle_action = QAction("Toggle Edge Segmentation", self)
         segmentation_toggle_action.triggered.connect(self.toggle_edge_segmentation)
         segmentation_toggle_action.setCheckable(True)
-        if main.G.is_directed() or main.subgraphs_included:
+        if self.graph.directed or self.graph.subgraphs_included:
             segmentation_toggle_action.setChecked(True)
         self.actions_menu.addAction(segmentation_toggle_action)
 
@@ -678,7 +689,7 @@ class MainWindow(QMainWindow):
         arrow_decrease_action = QAction("Decrease Arrow Size", self)
         arrow_decrease_action.triggered.connect(self.arrow_decrease_size)
 
-        if main.G.is_directed() == True:
+        if self.graph.directed == True:
             self.actions_menu.addAction(arrow_increase_action)
             self.actions_menu.addAction(arrow_decrease_action)
 
@@ -688,11 +699,40 @@ class MainWindow(QMainWindow):
         dynamic_force_layout_action.setCheckable(True)
         dynamic_force_layout_action.setChecked(False)
 
+        local_relaxation_action = QAction("Dynamic Forces Only Move Nodes Near the Dragged Node", self)
+        local_relaxation_action.triggered.connect(self.toggle_local_relaxation)
+        self.actions_menu.addAction(local_relaxation_action)
+        local_relaxation_action.setCheckable(True)
+        local_relaxation_action.setChecked(True)
+
+        pin_dragged_nodes_action = QAction("Pin Dragged Nodes (Double Click Toggles a Pin)", self)
+        pin_dragged_nodes_action.triggered.connect(self.toggle_pin_dragged_nodes)
+        self.actions_menu.addAction(pin_dragged_nodes_action)
+        pin_dragged_nodes_action.setCheckable(True)
+        pin_dragged_nodes_action.setChecked(True)
+
+        unpin_action = QAction("Unpin All Nodes", self)
+        unpin_action.setShortcut(Qt.Key_U)
+        unpin_action.triggered.connect(self.unpin_all)
+        self.actions_menu.addAction(unpin_action)
+
         force_custom_regeneration_action = QAction("Apply Force Direction on Current Layout", self)
         force_custom_regeneration_action.setShortcut(Qt.Key_F)
         force_custom_regeneration_action.triggered.connect(self.regenerate_force_custom)
         self.actions_menu.addAction(force_custom_regeneration_action)
 
+        stress_custom_regeneration_action = QAction("Apply Stress Majorization on Current Layout", self)
+        stress_custom_regeneration_action.setShortcut(Qt.Key_S)
+        stress_custom_regeneration_action.triggered.connect(self.regenerate_stress_custom)
+        self.actions_menu.addAction(stress_custom_regeneration_action)
+
+        self.live_simulation_action = QAction("Run Live Force Simulation on Current Layout", self)
+        self.live_simulation_action.setShortcut(Qt.Key_L)
+        self.live_simulation_action.triggered.connect(self.toggle_live_simulation)
+        self.actions_menu.addAction(self.live_simulation_action)
+        self.live_simulation_action.setCheckable(True)
+        self.live_simulation_action.setChecked(False)
+
             # graph regeneration
         layout_regeneration_action = QAction("Regenerate Layout", self) # will regenerate with same layout
         layout_regeneration_action.triggered.connect(self.regenerate)
@@ -713,17 +753,17 @@ class MainWindow(QMainWindow):
 
         radial_bfs_regeneration_action = QAction("Generate Radial BFS Tree Layout", self)
         radial_bfs_regeneration_action.triggered.connect(self.regenerate_radial_bfs)
-        if main.subgraphs_included == False:
+        if self.graph.subgraphs_included == False:
             self.layouts_menu.addAction(radial_bfs_regeneration_action)
 
         radial_dfs_regeneration_action = QAction("Generate Radial DFS Tree Layout", self)
         radial_dfs_regeneration_action.triggered.connect(self.regenerate_radial_dfs)
-        if main.subgraphs_included == False:
+        if self.graph.subgraphs_included == False:
             self.layouts_menu.addAction(radial_dfs_regeneration_action)
 
         radial_prims_regeneration_action = QAction("Generate Radial Prim's Tree Layout", self)
         radial_prims_regeneration_action.triggered.connect(self.regenerate_radial_prims)
-        if main.subgraphs_included == False:
+        if self.graph.subgraphs_included == False:
             self.layouts_menu.addAction(radial_prims_regeneration_action)
 
         force_random_regeneration_action = QAction("Generate Force Directed Random-Initialized Layout", self)
@@ -732,27 +772,47 @@ class MainWindow(QMainWindow):
 
         force_bfs_regeneration_action = QAction("Generate Force Directed BFS-Initialized Layout", self)
         force_bfs_regeneration_action.triggered.connect(self.regenerate_force_bfs)
-        if main.subgraphs_included == False:
+        if self.graph.subgraphs_included == False:
             self.layouts_menu.addAction(force_bfs_regeneration_action)         # do not include this with subgraphs until bfs is exhaustive
 
+        force_multilevel_regeneration_action = QAction("Generate Multilevel Force Directed Layout", self)
+        force_multilevel_regeneration_action.triggered.connect(self.regenerate_force_multilevel)
+        self.layouts_menu.addAction(force_multilevel_regeneration_action)
+
+        force_pivot_mds_regeneration_action = QAction("Generate Force Directed Pivot MDS-Initialized Layout", self)
+        force_pivot_mds_regeneration_action.triggered.connect(self.regenerate_force_pivot_mds)
+        self.layouts_menu.addAction(force_pivot_mds_regeneration_action)
+
+        force_best_regeneration_action = QAction("Generate Best of " + str(main.best_of_seeds) + " Force Directed Random-Initialized Layouts", self)
+        force_best_regeneration_action.triggered.connect(self.regenerate_force_best)
+        self.layouts_menu.addAction(force_best_regeneration_action)
+
+        stress_regeneration_action = QAction("Generate Stress Majorization Layout", self)
+        stress_regeneration_action.triggered.connect(self.regenerate_stress)
+        self.layouts_menu.addAction(stress_regeneration_action)
+
+        pivot_mds_regeneration_action = QAction("Generate Pivot MDS Layout", self)
+        pivot_mds_regeneration_action.triggered.connect(self.regenerate_pivot_mds)
+        self.layouts_menu.addAction(pivot_mds_regeneration_action)
+
         dag_dfs_barycenter_regeneration_action = QAction("Generate DAG DFS-Initialized Layout (Barycenter crossing minimization)", self)
         dag_dfs_barycenter_regeneration_action.triggered.connect(self.regenerate_dag_dfs_barycenter)
-        if main.subgraphs_included == False:
+        if self.graph.subgraphs_included == False:
             self.layouts_menu.addAction(dag_dfs_barycenter_regeneration_action)
 
         dag_dfs_median_regeneration_action = QAction("Generate DAG DFS-Initialized Layout (Median crossing minimization)", self)
         dag_dfs_median_regeneration_action.triggered.connect(self.regenerate_dag_dfs_median)
-        if main.subgraphs_included == False:
+        if self.graph.subgraphs_included == False:
             self.layouts_menu.addAction(dag_dfs_median_regeneration_action)
 
         tsne_regeneration_action = QAction("Generate TSNE projection", self)
         tsne_regeneration_action.triggered.connect(self.regenerate_tsne)
-        if main.subgraphs_included == False:
+        if self.graph.subgraphs_included == False:
             self.layouts_menu.addAction(tsne_regeneration_action)
 
         isomap_regeneration_action = QAction("Generate Isomap projection", self)
         isomap_regeneration_action.triggered.connect(self.regenerate_isomap)
-        if main.subgraphs_included == False:
+        if self.graph.subgraphs_included == False:
             self.layouts_menu.addAction(isomap_regeneration_action)
 
         
@@ -808,26 +868,18 @@ class MainWindow(QMainWindow):
 
         
         self.vertices = []
-        self.inter_layer_adjacency_dict = None
         self.interlayer_edge_objects = []
 
-        if main.subgraphs_included:
+        if self.graph.subgraphs_included:
             self.vertex_boxes = VertexBoxes(window = self, display = True, include_dummies = False)
         else:
             self.vertex_boxes = VertexBoxes(window = self, display = False, include_dummies = True)
         
-        if len(given_adjacency_dict_list) > 1:
-            self.adjacency_dict = []
-            for count in range(len(given_adjacency_dict_list)):
-                if count == len(given_adjacency_dict_list) - 1:
-                    self.inter_layer_adjacency_dict = given_adjacency_dict_list[count]
-                else:
-                    self.adjacency_dict.append(given_adjacency_dict_list[count])
-                    self.vertices.append({})
-
-        else:
-            self.adjacency_dict = given_adjacency_dict_list
+        # one adjacency dict per subgraph (just one without subgraphs), the edges between subgraphs are kept apart
+        self.adjacency_dict = list(given_adjacency_dict_list)
+        for count in range(len(self.adjacency_dict)):
             self.vertices.append({})
+        self.inter_layer_adjacency_dict = graph.interlayer_adjacency_dict
         
         self.vertex_boxes.update_path()
         self.scene.addItem(self.vertex_boxes)
@@ -843,17 +895,19 @@ class MainWindow(QMainWindow):
         self.coordinates = []
         self.dfs_trees = []
         self.floyd_warshall_matrix = []
+        self.distance_node_ids = []          # node of every row of floyd_warshall_matrix and projection_matrix
         self.projection_matrix = []
         
-        for count in range(len(self.vertices)):
-            self.initialize_vertices(index = count)
+        with main.profile_phase("create window items"):
+            for count in range(len(self.vertices)):
+                self.initialize_vertices(index = count)
 
-        if self.inter_layer_adjacency_dict != None:
-            #print("initializing interlayer edges based on dict", self.inter_layer_adjacency_dict)
-            self.initialize_interlayer_edges()
+            if self.inter_layer_adjacency_dict != None:
+                #print("initializing interlayer edges based on dict", self.inter_layer_adjacency_dict)
+                self.initialize_interlayer_edges()
 
-        # Subgraph settings
-        self.default_subgraph_distance = (self.screenwidth - 50 - self.node_radius * 2)  / 2        
+        # Subgraph settings, the subgraphs are placed next to each other in columns of this width
+        self.default_subgraph_distance = (self.screenwidth - 50 - self.node_radius * 2)  / len(self.vertices)
         self.show_subgraph_boxes = True  
 
         # Default Settings
@@ -861,15 +915,26 @@ class MainWindow(QMainWindow):
         self.first_generation = True
         self.display_non_tree_edges = False
         self.dynamic_forces = False
+        self.local_relaxation = True                     # with dynamic forces, a dragged node only moves the nodes around it, see relax_around_vertex
+        self.pinned_ids = set()                          # nodes that the force layouts on the current layout do not move, see toggle_pin
+        self.layout_seed = None                          # seed of the last randomized layout, generating with main.layout_seed set to it repeats the layout
+        self.pin_dragged_nodes = True                    # a node is pinned when it is dragged to a new place
         self.strict_force_binding = True
         self.edge_bundling_bool = True                   # set this to false to speed up subgraphs, as edge bundling won't be calculated
-        self.regenerate()
-
-        assert (self.visibility(p_start = (0,0) ,p_end = (0,10), q_start = (10,0), q_end = (10,10), printing = False) == 1.0)
-        # print("testvis is",test_vis)      # should be 1
-        assert (self.visibility(p_start = (0,0) ,p_end = (1,0), q_start = (0.5,1), q_end = (1.5,1.0), printing = False) == 0)
-        
-        assert(self.visibility(p_start = (0,0) ,p_end = (10,0), q_start = (5,10), q_end = (15,10), printing = False) == 0)
+        self.simulation_frame_budget = 0.03              # seconds of force iterations per frame of the live simulation
+        self.simulation_max_iterations = 500
+        self.simulations = []
+        self.simulation_timer = QTimer(self)
+        self.simulation_timer.timeout.connect(self.simulation_tick)
+        with main.profile_phase("first regenerate"):
+            self.regenerate()
+
+        with main.profile_phase("visibility self-test"):
+            assert (self.visibility(p_start = (0,0) ,p_end = (0,10), q_start = (10,0), q_end = (10,10), printing = False) == 1.0)
+            # print("testvis is",test_vis)      # should be 1
+            assert (self.visibility(p_start = (0,0) ,p_end = (1,0), q_start = (0.5,1), q_end = (1.5,1.0), printing = False) == 0)
+            
+            assert(self.visibility(p_start = (0,0) ,p_end = (10,0), q_start = (5,10), q_end = (15,10), printing = False) == 0)
         
  
         self.view.show()
@@ -1030,51 +1095,39 @@ class MainWindow(QMainWindow):
         printing = False
         alpha = 2
 
-        if main.subgraphs_included:
+        if self.graph.subgraphs_included:
             fw_matrix_list = []
             in_dict_list = []
             for index in range(len(self.coordinates)):
-                fw_matrix, in_dict = main.floyd_warshall_matrix(main.subgraphs_list[index])
+                fw_matrix, in_dict = main.floyd_warshall_matrix(self.graph.subgraphs_list[index])
                 fw_matrix_list.append(fw_matrix)
                 in_dict_list.append(in_dict)
         else:
-            self.floyd_warshall_matrix, index_node_dict = main.floyd_warshall_matrix(main.G)
-
-        numerator = 0
-        denominator = 0
+            self.floyd_warshall_matrix, index_node_dict = main.floyd_warshall_matrix(self.graph.G)
 
         for index, subgraph_coordinates in enumerate(self.coordinates):
 
-            if main.subgraphs_included:
+            if self.graph.subgraphs_included:
                 self.floyd_warshall_matrix = fw_matrix_list[index]
                 index_node_dict = in_dict_list[index]
-
-            generalized_stress = 0
-            for i, nodeid_i in enumerate(subgraph_coordinates):
-                for j in range(i, len(subgraph_coordinates)):               # here if we check i,j then we don't check j,i
-                    if i == j:
-                        continue
-                    nodeid_j = index_node_dict[j]
-                    
-                    #compute the distance in floyd warshall matrix
-                    floyd_warshall_dist = self.floyd_warshall_matrix[i][j]
-                    #compute distance in self.coordinates projection
-                    node_i = self.coordinates[index][nodeid_i]
-                    node_j = self.coordinates[index][nodeid_j]
-                    projection_dist = main.calc_eucl_dist(node_i[0], node_i[1], node_j[0], node_j[1])
-                    #square the floyd - projection and sum it to the numerator
-                    numerator = (floyd_warshall_dist - projection_dist) ** 2
-                    #sum the distance to the denominator
-                    denominator = floyd_warshall_dist ** 2
-                    if denominator == 0:
-                        print(i, j, nodeid_i, nodeid_j)
-                        raise ValueError("denominator is 0")
-                    if printing:     
-                        print(numerator, denominator, alpha, denominator ** alpha, numerator / (denominator ** alpha), generalized_stress)
-                        #raise ValueError("division went wrong")
-                    generalized_stress += numerator / (denominator ** alpha)
-                #    print(denominator, alpha, (denominator ** alpha))
-                  #  print(numerator, denominator, numerator / (denominator ** alpha), generalized_stress)
+            self.distance_node_ids = [index_node_dict[j] for j in range(len(index_node_dict))]
+
+            # node i of the coordinates against node j of the floyd warshall matrix, for every pair i < j
+            layout_state = main.LayoutState.from_coordinates(subgraph_coordinates)
+            nr_nodes = len(layout_state)
+            columns = layout_state.indices([index_node_dict[j] for j in range(nr_nodes)])
+            upper = np.triu_indices(nr_nodes, 1)
+            floyd_warshall_dist = np.asarray(self.floyd_warshall_matrix)[:nr_nodes, :nr_nodes][upper]
+            projection_dist = np.hypot(layout_state.x[upper[0]] - layout_state.x[columns[upper[1]]], layout_state.y[upper[0]] - layout_state.y[columns[upper[1]]])
+            numerator = (floyd_warshall_dist - projection_dist) ** 2
+            denominator = floyd_warshall_dist ** 2
+            if (denominator == 0).any():
+                i, j = upper[0][denominator == 0][0], upper[1][denominator == 0][0]
+                print(i, j, layout_state.node_ids[i], index_node_dict[j])
+                raise ValueError("denominator is 0")
+            if printing:
+                print(numerator, denominator, alpha, denominator ** alpha, numerator / (denominator ** alpha))
+            generalized_stress = float(np.sum(numerator / (denominator ** alpha)))
 
             if len(self.coordinates) == 1:
                 print("The general stress of the layout is",generalized_stress)
@@ -1085,50 +1138,44 @@ class MainWindow(QMainWindow):
 
     
     def normalized_stress(self):
-        numerator = 0
-        denominator = 0
         index = 0
 
-        for i, nodeid_i in enumerate(self.coordinates[index]):
-            for j, nodeid_j in enumerate(self.coordinates[index]):
-                #compute the distance in floyd warshall matrix
-                floyd_warshall_dist = self.floyd_warshall_matrix[i][j]
-                #compute distance in self.coordinates projection
-                node_i = self.coordinates[index][nodeid_i]
-                node_j = self.coordinates[index][nodeid_j]
-                projection_dist = main.calc_eucl_dist(node_i[0], node_i[1], node_j[0], node_j[1])
-                #square the floyd - projection and sum it to the numerator
-                numerator += (floyd_warshall_dist - projection_dist) ** 2
-                #sum the distance to the denominator
-                denominator += floyd_warshall_dist ** 2
-
-        norm_stress = numerator / denominator
+        floyd_warshall_dist, projection_dist = self.projection_distances(index)
+        connected = np.isfinite(floyd_warshall_dist)
+        floyd_warshall_dist, projection_dist = floyd_warshall_dist[connected], projection_dist[connected]
+        # the layouts are scaled to the screen, so the layout distances are compared at the scale that fits the graph distances best
+        scale = np.sum(floyd_warshall_dist * projection_dist) / max(np.sum(projection_dist ** 2), 1e-300)
+        numerator = np.sum((floyd_warshall_dist - scale * projection_dist) ** 2)
+        denominator = np.sum(floyd_warshall_dist ** 2)
+
+        norm_stress = float(numerator / denominator)
 
         print("normalized stress is", norm_stress)
         self.status.showMessage("The normalized stress is "+str(norm_stress))
 
     
     
+    def projection_distances(self, index = 0):
+        """
+        output: the floyd warshall distance and the distance in the layout for every pair of nodes, as matrices in the order of distance_node_ids
+        """
+        layout_state = main.LayoutState.from_coordinates(self.coordinates[index])
+        columns = layout_state.indices(self.distance_node_ids)
+        x, y = layout_state.x[columns], layout_state.y[columns]
+        floyd_warshall_dist = np.asarray(self.floyd_warshall_matrix)
+        projection_dist = np.hypot(x[:, None] - x[None, :], y[:, None] - y[None, :])
+        return floyd_warshall_dist, projection_dist
+
     def shepard_diagram(self, index = 0):
-        x = [] # floyd warshall is original distance matrix and belongs on the x-axis
-        y = [] # projected distance belongs on the y-axis
-
-        for i, nodeid_i in enumerate(self.coordinates[index]):
-            for j, nodeid_j in enumerate(self.coordinates[index]):
-                #compute distance in self.coordinates projection
-                node_i = self.coordinates[index][nodeid_i]
-                node_j = self.coordinates[index][nodeid_j]
-                projection_dist = main.calc_eucl_dist(node_i[0], node_i[1], node_j[0], node_j[1])
-                y.append(projection_dist)
-
-                #compute the distance in floyd warshall matrix
-                floyd_warshall_dist = self.floyd_warshall_matrix[i][j]
-                x.append(floyd_warshall_dist)
+        floyd_warshall_dist, projection_dist = self.projection_distances(index)
+        x = floyd_warshall_dist.ravel() # floyd warshall is original distance matrix and belongs on the x-axis
+        y = projection_dist.ravel() # projected distance belongs on the y-axis
             
-        spearmanrank = scipy.stats.spearmanr(x, y)[0]
+        spearmanrank = main.lazy_import("scipy.stats").spearmanr(x, y)[0]
         print("spearman rank correlation: ", spearmanrank)
         self.status.showMessage("The Spearman rank correlation is "+str(spearmanrank))
 
+        plt = main.lazy_import("matplotlib.pyplot")
         plt.scatter(x,y)
         plt.title("Shepard diagram of " + str(self.layout))
         plt.xlabel("Distance in the Floyd-Warshall distance matrix (input)")
@@ -1143,8 +1190,8 @@ class MainWindow(QMainWindow):
         trust = 0
         k = math.floor(math.sqrt(nr_nodes))
         constant = 2 / ((nr_nodes * k) * (2*nr_nodes - 3*k - 1))
-        neigh_before = NearestNeighbors(n_neighbors=k, metric="precomputed").fit(floyd_no_inf) #check if this one adds up becaues it has a lot of the same nearest neighbors for each node
-        neigh_after = NearestNeighbors(n_neighbors=k).fit(self.projection_matrix)
+        neigh_before = main.lazy_import("sklearn.neighbors").NearestNeighbors(n_neighbors=k, metric="precomputed").fit(floyd_no_inf) #check if this one adds up becaues it has a lot of the same nearest neighbors for each node
+        neigh_after = main.lazy_import("sklearn.neighbors").NearestNeighbors(n_neighbors=k).fit(self.projection_matrix)
         knn_before = neigh_before.kneighbors(return_distance=False)
         knn_after = neigh_after.kneighbors(return_distance=False)
 
@@ -1165,8 +1212,8 @@ class MainWindow(QMainWindow):
         floyd_no_inf = np.nan_to_num(self.floyd_warshall_matrix, posinf=333333333333)
         nr_nodes = len(self.floyd_warshall_matrix[0])
         k = math.floor(math.sqrt(nr_nodes))
-        neigh_before = NearestNeighbors(n_neighbors=k, metric="precomputed").fit(floyd_no_inf)
-        neigh_after = NearestNeighbors(n_neighbors=k).fit(self.projection_matrix)
+        neigh_before = main.lazy_import("sklearn.neighbors").NearestNeighbors(n_neighbors=k, metric="precomputed").fit(floyd_no_inf)
+        neigh_after = main.lazy_import("sklearn.neighbors").NearestNeighbors(n_neighbors=k).fit(self.projection_matrix)
         constant = 2 / ((nr_nodes * k) * (2*nr_nodes - 3*k - 1))
         knn_before = neigh_before.kneighbors(return_distance=False)
         knn_after = neigh_after.kneighbors(return_distance=False)
@@ -1185,7 +1232,8 @@ class MainWindow(QMainWindow):
 
 
     def update_status(self):
-        self.status.showMessage("Graph with "+str(len(self.all_vertices.values()))+" nodes and "+str(len(self.all_edges.values()))+" edges loaded and displayed - layout: "+self.layout)
+        self.status.showMessage("Graph with "+str(len(self.all_vertices.values()))+" nodes and "+str(len(self.all_edges.values()))+" edges loaded and displayed - layout: "+self.layout
+                               +(" (seed "+str(self.layout_seed)+")" if self.layout_seed is not None else ""))
 
     def update_node_position(self, node_id, x, y, index = 0):
         self.coordinates[index][node_id] = (x,y)
@@ -1214,8 +1262,13 @@ class MainWindow(QMainWindow):
         
     def translate_coordinates(self, coordinates, xtrans = 0, ytrans = 0):
         """
-        get a x and y translation as input, and a coordinates dictionary with node ids as key and a tuple as coordinates as a value
+        get a x and y translation as input, and a coordinates dictionary with node ids as key and a tuple as coordinates as a value.
+        a LayoutState is translated in place
         """
+        if isinstance(coordinates, main.LayoutState):
+            coordinates.translate(xtrans, ytrans)
+            return coordinates
+
         translated_coordinates = coordinates.copy()
 
         for node_id, val in coordinates.items():
@@ -1227,7 +1280,7 @@ class MainWindow(QMainWindow):
         
         
  # layout selector             
-    def generate(self, layout, subgraph_distance = None, use_screen_attributes = True, width = None, height = None, index = 0, random_subgraph_shuffle = False, use_first_dfs = False):
+    def generate(self, layout, subgraph_distance = None, use_screen_attributes = True, width = None, height = None, index = 0, random_subgraph_shuffle = False, use_first_dfs = False, seed = None):
         if use_screen_attributes:
             width = self.screenwidth - 50 - self.node_radius * 2
             height = self.screenheight - 75 - self.node_radius * 2
@@ -1240,14 +1293,15 @@ class MainWindow(QMainWindow):
 
                 
         self.layout = layout
+        seed, rng = main.layout_rng(main.layout_seed if seed is None else seed)       # all randomized layouts draw from rng, so the seed repeats the layout
         if self.layout == "random":
-            if main.subgraphs_included and not random_subgraph_shuffle:
-                self.coordinates[index] = main.create_random_coordinates(width/2, height, self.adjacency_dict[index])
+            if self.graph.subgraphs_included and not random_subgraph_shuffle:
+                self.coordinates[index] = main.create_random_coordinates(width/len(self.vertices), height, self.adjacency_dict[index], seed = rng)
             else:
-                self.coordinates[index] = main.create_random_coordinates(width, height, self.adjacency_dict[index])
+                self.coordinates[index] = main.create_random_coordinates(width, height, self.adjacency_dict[index], seed = rng)
             self.reset_edge_waypoints()
         elif self.layout == ("solar" or "solar random"):
-            self.coordinates[index] = main.create_solar_coordinates(width, height, self.adjacency_dict[index], index = index)
+            self.coordinates[index] = main.create_solar_coordinates(width, height, self.adjacency_dict[index], index = index, seed = rng)
             self.reset_edge_waypoints()
         elif self.layout == "solar deterministic":
             self.coordinates[index] = main.create_solar_coordinates(width, height, self.adjacency_dict[index], index = index, deterministic = True)
@@ -1255,104 +1309,151 @@ class MainWindow(QMainWindow):
         elif self.layout == "radial dfs":
             if self.dfs_list == []:
                 for count in range(len(self.vertices)):
-                    self.depth_first_search(root=main.most_connected_node_id[count], index = count)
+                    self.depth_first_search(root=self.graph.most_connected_node_id[count], index = count)
             self.treetype = "dfs"                
-            self.coordinates[index] = main.create_radial_coordinates(width, height, self.dfs_list[index], self.node_radius)
+            self.coordinates[index] = main.create_radial_forest_coordinates(width, height, self.dfs_list[index], self.node_radius)
             self.reset_edge_waypoints()
         elif self.layout == "radial bfs":
             if self.bfs_list == []:
                 for count in range(len(self.vertices)):
-                    self.breadth_first_search(root=main.most_connected_node_id[count], index = count)
+                    self.breadth_first_search(root=self.graph.most_connected_node_id[count], index = count)
                     
             self.treetype = "bfs"
-            self.coordinates[index] = main.create_radial_coordinates(width, height, self.bfs_list[index], self.node_radius)
+            self.coordinates[index] = main.create_radial_forest_coordinates(width, height, self.bfs_list[index], self.node_radius)
             self.reset_edge_waypoints()
         elif self.layout == "radial prims":
             if self.prims_list == []:
                 for count in range(len(self.vertices)):
-                    self.prims_algorithm(root=main.most_connected_node_id[count], index = count)
+                    self.prims_algorithm(root=self.graph.most_connected_node_id[count], index = count)
             self.treetype = "prims"
-            self.coordinates[index] = main.create_radial_coordinates(width, height, self.prims_list[index], self.node_radius)
+            self.coordinates[index] = main.create_radial_forest_coordinates(width, height, self.prims_list[index], self.node_radius)
             self.reset_edge_waypoints()
             
-        elif self.layout == "force bfs":            # do not use this until bfs has been made exhaustive
+        elif self.layout == "force bfs":
             if self.bfs_list == []:
                 for count in range(len(self.vertices)):
-                    self.breadth_first_search(root=main.most_connected_node_id[count], index = count)
-            bfs_coords = main.create_radial_coordinates(width, height, self.bfs_list[index], self.node_radius)
+                    self.breadth_first_search(root=self.graph.most_connected_node_id[count], index = count)
+            bfs_coords = main.create_radial_forest_coordinates(width, height, self.bfs_list[index], self.node_radius)
             print("calculating force bfs coordinates for index",index)
-            self.coordinates[index] = main.create_force_layout_coordinates(width, height, bfs_coords, self.adjacency_dict[index], index = index)
+            self.coordinates[index] = main.create_component_layout(main.create_force_layout_coordinates, width, height, self.adjacency_dict[index], initial_coords = bfs_coords, index = index, seed = rng)
             self.reset_edge_waypoints()
 
         elif self.layout == "force random":
             
-            if main.subgraphs_included:
-                random_coords = main.create_random_coordinates(width/2, height, self.adjacency_dict[index])
-                self.coordinates[index] = main.create_force_layout_coordinates(width/2, height, random_coords, self.adjacency_dict[index], max_iterations = 150, index = index)
-                if index == 0:
-                    self.coordinates[index] = self.translate_coordinates(self.coordinates[index], -subgraph_distance/2, 0)
-                else:
-                    self.coordinates[index] = self.translate_coordinates(self.coordinates[index], subgraph_distance/2, 0)
+            if self.graph.subgraphs_included:
+                random_coords = main.create_random_coordinates(width/len(self.vertices), height, self.adjacency_dict[index], seed = rng)
+                self.coordinates[index] = main.create_component_layout(main.create_force_layout_coordinates, width/len(self.vertices), height, self.adjacency_dict[index], initial_coords = random_coords, max_iterations = 150, index = index, seed = rng)
+                self.coordinates[index] = self.translate_coordinates(self.coordinates[index], self.subgraph_offset(index, subgraph_distance), 0)
 
-                self.coordinates[index] = main.create_force_layout_coordinates(width, height, self.coordinates[index], self.adjacency_dict[index], max_iterations = 50, index = index)       # extra iterations
+                self.coordinates[index] = main.create_force_layout_coordinates(width, height, self.coordinates[index], self.adjacency_dict[index], max_iterations = 50, index = index, seed = rng)       # extra iterations
                 self.reset_edge_waypoints()
 
             else:
-                random_coords = main.create_random_coordinates(width, height, self.adjacency_dict[index])
-                self.coordinates[index] = main.create_force_layout_coordinates(width, height, random_coords, self.adjacency_dict[index], index = index)
+                random_coords = main.create_random_coordinates(width, height, self.adjacency_dict[index], seed = rng)
+                self.coordinates[index] = main.create_component_layout(main.create_force_layout_coordinates, width, height, self.adjacency_dict[index], initial_coords = random_coords, index = index, seed = rng)
                 self.reset_edge_waypoints()
 
+
+        elif self.layout == "force multilevel":
+            if self.graph.subgraphs_included:
+                width = width/len(self.vertices)
+            self.coordinates[index] = main.create_component_layout(main.create_multilevel_force_layout_coordinates, width, height, self.adjacency_dict[index], seed = rng)
+            self.reset_edge_waypoints()
+
+        elif self.layout == "force pivot mds":
+            if self.graph.subgraphs_included:
+                width = width/len(self.vertices)
+            pivot_mds_coords = main.create_pivot_mds_coordinates(width, height, self.adjacency_dict[index])
+            self.coordinates[index] = main.create_component_layout(main.create_force_layout_coordinates, width, height, self.adjacency_dict[index], initial_coords = pivot_mds_coords, index = index, max_start_temp = 32, seed = rng)      # a low temperature keeps the pivot mds layout
+            self.reset_edge_waypoints()
+
+        elif self.layout == "force best":
+            if self.graph.subgraphs_included:
+                width = width/len(self.vertices)
+            # the seeds of every component already run in parallel
+            self.coordinates[index] = main.create_component_layout(main.create_best_force_layout_coordinates, width, height, self.adjacency_dict[index], processes = 1, seed = rng)
+            self.reset_edge_waypoints()
             
         elif self.layout == "force custom":
             if self.strict_force_binding == True:
-                self.coordinates[index] = main.create_force_layout_coordinates(width, height, self.coordinates[index], self.adjacency_dict[index], max_iterations=50, index = index)
+                self.coordinates[index] = main.create_force_layout_coordinates(width, height, self.coordinates[index], self.adjacency_dict[index], max_iterations=50, index = index, pinned = self.pinned_ids, seed = rng)
+            else:
+                self.coordinates[index] = main.create_force_layout_coordinates(self.scene.width(), self.scene.height(), self.coordinates[index], self.adjacency_dict[index], max_iterations=50, index = index, pinned = self.pinned_ids, seed = rng)
+            self.reset_edge_waypoints()
+
+        elif self.layout == "stress":
+            if self.graph.subgraphs_included:
+                width = width/len(self.vertices)
+            self.coordinates[index] = main.create_component_layout(main.create_stress_majorization_coordinates, width, height, self.adjacency_dict[index], seed = rng)
+            self.reset_edge_waypoints()
+
+        elif self.layout == "pivot mds":
+            if self.graph.subgraphs_included:
+                self.coordinates[index] = main.create_pivot_mds_coordinates(width/len(self.vertices), height, self.adjacency_dict[index])
             else:
-                self.coordinates[index] = main.create_force_layout_coordinates(self.scene.width(), self.scene.height(), self.coordinates[index], self.adjacency_dict[index], max_iterations=50, index = index)
+                self.coordinates[index] = main.create_pivot_mds_coordinates(width, height, self.adjacency_dict[index])
+            self.reset_edge_waypoints()
+
+        elif self.layout == "stress custom":
+            self.coordinates[index] = main.create_stress_majorization_coordinates(width, height, self.adjacency_dict[index], initial_coords = self.coordinates[index])
             self.reset_edge_waypoints()
 
         elif self.layout == "dag dfs barycenter":
-            if use_first_dfs or main.subgraphs_included:
+            if use_first_dfs or self.graph.subgraphs_included:
                 if self.dfs_list == []:
                     for count in range(len(self.vertices)):
-                        self.depth_first_search(root=main.most_connected_node_id[count], index = count)
-                self.coordinates[index], edge_waypoints = main.calc_DAG(width, height, [self.dfs_list[index]], self.adjacency_dict[index], minimization_method="barycenter")
+                        self.depth_first_search(root=self.graph.most_connected_node_id[count], index = count)
+                self.coordinates[index], edge_waypoints = main.calc_component_DAG(width, height, main.split_forest(self.dfs_list[index]), self.adjacency_dict[index], minimization_method="barycenter")
                 self.update_edge_waypoints(edge_waypoints)
             else:
                 if self.dfs_trees == []:
                     self.depth_first_search_exhaustive()
                 #print("self.dfs_trees:",self.dfs_trees)
-                self.coordinates[index], edge_waypoints = main.calc_DAG(width, height, self.dfs_trees, self.adjacency_dict[index], minimization_method="barycenter")
+                self.coordinates[index], edge_waypoints = main.calc_component_DAG(width, height, self.dfs_trees, self.adjacency_dict[index], minimization_method="barycenter")
                 self.update_edge_waypoints(edge_waypoints)
             
         elif self.layout == "dag dfs median":
-            if use_first_dfs or main.subgraphs_included:
+            if use_first_dfs or self.graph.subgraphs_included:
                 if self.dfs_list == []:
                     for count in range(len(self.vertices)):
-                        self.depth_first_search(root=main.most_connected_node_id[count], index = count)
-                self.coordinates[index], edge_waypoints = main.calc_DAG(width, height, [self.dfs_list[index]], self.adjacency_dict[index], minimization_method="median")
+                        self.depth_first_search(root=self.graph.most_connected_node_id[count], index = count)
+                self.coordinates[index], edge_waypoints = main.calc_component_DAG(width, height, main.split_forest(self.dfs_list[index]), self.adjacency_dict[index], minimization_method="median")
                 self.update_edge_waypoints(edge_waypoints)
             else:
                 if self.dfs_trees == []:
                     self.depth_first_search_exhaustive()
-                self.coordinates[index], edge_waypoints = main.calc_DAG(width, height, self.dfs_trees, self.adjacency_dict[index], minimization_method="median")
+                self.coordinates[index], edge_waypoints = main.calc_component_DAG(width, height, self.dfs_trees, self.adjacency_dict[index], minimization_method="median")
                 self.update_edge_waypoints(edge_waypoints)
 
         elif self.layout == "t-SNE":
-            self.floyd_warshall_matrix, index_node_dict = main.floyd_warshall_matrix(main.G)
-            self.coordinates[index], self.projection_matrix = main.get_tsne_coordinates(self.floyd_warshall_matrix, index_node_dict) 
+            pivot_mds_coords = main.create_pivot_mds_coordinates(width, height, self.adjacency_dict[index])
+            self.coordinates[index] = main.create_component_layout(main.create_tsne_coordinates, width, height, self.adjacency_dict[index], initial_coords = pivot_mds_coords, seed = rng)
+            self.set_projection_matrix(index)
             self.reset_edge_waypoints()
 
         elif self.layout == "ISOMAP":
-            self.floyd_warshall_matrix, index_node_dict = main.floyd_warshall_matrix(main.G)
-            self.coordinates[index], self.projection_matrix = main.get_isomap_coordinates(self.floyd_warshall_matrix, index_node_dict)  
+            self.coordinates[index] = main.create_component_layout(main.create_isomap_coordinates, width, height, self.adjacency_dict[index], seed = rng)
+            self.set_projection_matrix(index)
             self.reset_edge_waypoints()
 
         else:
             print("asked for layout", layout)
             raise ValueError ("Unsupported layout "+layout+" requested")
+        # only the layouts that drew from rng record a seed with their coordinates
+        self.layout_seed = seed if getattr(self.coordinates[index], "seed", None) is not None else None
         
 #        print("the resulting coordinates on index",index, "are for node",self.coordinates[index].keys())
 
+    def set_projection_matrix(self, index = 0):
+        """
+        the graph distances used by the projection metrics (normalized stress, shepard diagram, trustworthiness and continuity)
+        and the positions of the layout in the same order
+        """
+        self.distance_node_ids, self.floyd_warshall_matrix = main.graph_distance_matrix(self.adjacency_dict[index])
+        layout_state = main.LayoutState.from_coordinates(self.coordinates[index])
+        columns = layout_state.indices(self.distance_node_ids)
+        self.projection_matrix = np.column_stack((layout_state.x[columns], layout_state.y[columns]))
+
     def reset_edge_waypoints(self):
         for edge_object in self.all_edges.values():
             edge_object.reset_waypoints()
@@ -1377,6 +1478,12 @@ class MainWindow(QMainWindow):
 
 
 # recreate the graph
+    def subgraph_offset(self, index, subgraph_distance):
+        """
+        x offset of the column of subgraph index, the columns are subgraph_distance apart and centered around 0
+        """
+        return (index - (len(self.vertices) - 1) / 2) * subgraph_distance
+
     def regenerate(self, same_positions = False, subgraph_distance = None):
         if main.printing_mode:
             print("calling regenerate")
@@ -1384,22 +1491,27 @@ class MainWindow(QMainWindow):
 
         if subgraph_distance == None:
             subgraph_distance = self.default_subgraph_distance
+
+        if self.simulation_timer.isActive():
+            self.stop_live_simulation(update = False)
             
         # create new set of coordinates based on the current layout
         if not same_positions:
+            # one seed for all subgraphs, every subgraph is laid out from its own seed drawn from it, so the recorded seed repeats all of them
+            seed, rng = main.layout_rng(main.layout_seed)
+            subgraph_seeds = [seed] if len(self.vertices) == 1 else rng.integers(2**31, size = len(self.vertices)).tolist()
             for index in range(len(self.vertices)):
-                self.generate(self.layout, index = index, subgraph_distance = subgraph_distance)
+                self.generate(self.layout, index = index, subgraph_distance = subgraph_distance, seed = subgraph_seeds[index])
+            if self.layout_seed is not None:
+                self.layout_seed = seed
         
         if (self.first_generation == False and self.check_for_tree_layout() == True):
             for item in self.scene.items():
                 item.displayed = False
 
-        if len(self.vertices) > 1 and self.layout not in ["force custom", "force random"]:
+        if len(self.vertices) > 1 and self.layout not in ["force custom", "force random", "stress custom"]:
             for index, untranslated_coordinates in enumerate(self.coordinates):
-                if index == 0:
-                    self.coordinates[index] = self.translate_coordinates(untranslated_coordinates, -subgraph_distance/2, 0)
-                else:
-                    self.coordinates[index] = self.translate_coordinates(untranslated_coordinates, subgraph_distance/2, 0)
+                self.coordinates[index] = self.translate_coordinates(untranslated_coordinates, self.subgraph_offset(index, subgraph_distance), 0)
 
 
 
@@ -1407,17 +1519,11 @@ class MainWindow(QMainWindow):
      #   print("self coordinates index 0 keys:",self.coordinates[0].keys())
       #  print("self coordinates index 1 keys", self.coordinates[1].keys())
 
+        self.move_vertices()
+
         for index in range(len(self.coordinates)):
-            #print("moving all vertices of index",index)
             #print("these are:",self.coordinates[index].keys())
             for vertex_id in self.coordinates[index].keys():
-                x,y = self.coordinates[index][vertex_id]
-
-                if main.printing_mode:
-                    print("reset vertex",vertex_id,"at x_val",x,"and y_val",-y)
-
-                self.all_vertices[vertex_id].moveVertex(x,-y)
-                
                 if self.check_for_tree_layout() and not self.display_non_tree_edges:
                     self.all_vertices[vertex_id].turnVisible(edge_update = False)
                 else:
@@ -1464,7 +1570,7 @@ class MainWindow(QMainWindow):
             self.trustworthiness_action.setEnabled(False)
             self.continuity_action.setEnabled(False)
 
-        if self.edge_bundling_bool and main.subgraphs_included:
+        if self.edge_bundling_bool and self.graph.subgraphs_included:
             print("starting edge bundling")
             self.edge_bundling()
         
@@ -1827,10 +1933,34 @@ class MainWindow(QMainWindow):
         self.layout = "force bfs"
         self.regenerate()
     
+    def regenerate_force_multilevel(self):
+        self.layout = "force multilevel"
+        self.regenerate()
+
+    def regenerate_force_pivot_mds(self):
+        self.layout = "force pivot mds"
+        self.regenerate()
+
+    def regenerate_force_best(self):
+        self.layout = "force best"
+        self.regenerate()
+
     def regenerate_force_custom(self):
         self.layout = "force custom"
         self.regenerate()
 
+    def regenerate_stress(self):
+        self.layout = "stress"
+        self.regenerate()
+
+    def regenerate_pivot_mds(self):
+        self.layout = "pivot mds"
+        self.regenerate()
+
+    def regenerate_stress_custom(self):
+        self.layout = "stress custom"
+        self.regenerate()
+
     def regenerate_dag_dfs_barycenter(self):
         self.layout = "dag dfs barycenter"
         self.regenerate()
@@ -1863,7 +1993,7 @@ class MainWindow(QMainWindow):
             for e_tuple in self.adjacency_dict[index][start_id]:
                 end_id, to_create, weight = e_tuple
                 if to_create == True:
-                    if main.G.is_directed() == True:
+                    if self.graph.directed == True:
                         new_edge = Edge(self.vertices[index][start_id],self.vertices[index][end_id], weight, segmented = True)
                     else:
                         new_edge = Edge(self.vertices[index][start_id],self.vertices[index][end_id], weight, segmented = False)
@@ -1880,7 +2010,7 @@ class MainWindow(QMainWindow):
                 end_id, to_create, weight = e_tuple
                 end_index = self.all_vertices[end_id].subgraph
                 if to_create == True:
-                    if main.G.is_directed() == True:
+                    if self.graph.directed == True:
                         new_edge = Edge(self.vertices[start_index][start_id],self.vertices[end_index][end_id], weight, segmented = True)
                     else:
                         new_edge = Edge(self.vertices[start_index][start_id],self.vertices[end_index][end_id], weight, segmented = False)
@@ -1951,9 +2081,136 @@ class MainWindow(QMainWindow):
         self.vertex_boxes.toggle_display()
         self.scene.update()
         
+    def move_vertices(self, node_ids = None):
+        """
+        moves the vertices of node_ids (by default all vertices) to their position in self.coordinates, the edges of the moved vertices
+        are updated once afterwards instead of after every vertex
+        """
+        moved_edges = {}
+        for index in range(len(self.coordinates)):
+            #print("moving all vertices of index",index)
+            if node_ids is None:
+                positions = self.coordinates[index].items()
+            else:
+                positions = [(vertex_id, self.coordinates[index][vertex_id]) for vertex_id in node_ids if vertex_id in self.coordinates[index]]
+            for vertex_id, (x, y) in positions:
+
+                if main.printing_mode:
+                    print("reset vertex",vertex_id,"at x_val",x,"and y_val",-y)
+
+                vertex = self.all_vertices[vertex_id]
+                vertex.moveVertex(x, -y, edge_update = False)
+                for edge, other in vertex.edges:
+                    moved_edges[id(edge)] = edge
+
+        for edge in moved_edges.values():
+            edge.calculate_location()
+        self.scene.update()
+
+    def toggle_live_simulation(self):
+        if self.simulation_timer.isActive():
+            self.stop_live_simulation()
+        else:
+            self.start_live_simulation()
+
+    def start_live_simulation(self):
+        """
+        runs the force layout on the current layout a few iterations per frame, see simulation_tick, so the window stays responsive
+        """
+        if self.strict_force_binding == True:
+            width = self.screenwidth - 50 - self.node_radius * 2
+            height = self.screenheight - 75 - self.node_radius * 2
+        else:
+            width = self.scene.width()
+            height = self.scene.height()
+
+        self.layout = "force custom"
+        self.reset_edge_waypoints()
+        self.simulations = []
+        for index in range(len(self.coordinates)):
+            simulation = main.ForceSimulation.from_coordinates(width, height, self.coordinates[index], self.adjacency_dict[index], pinned = self.pinned_ids, max_iterations = self.simulation_max_iterations,
+                                                               repulsion = main.force_repulsion, theta = main.barnes_hut_theta, cutoff = main.grid_cutoff)
+            self.coordinates[index] = simulation.layout_state            # the simulation moves these coordinates in place
+            self.simulations.append(simulation)
+
+        self.live_simulation_action.setChecked(True)
+        self.status.showMessage("Live force simulation running, press L to stop")
+        self.simulation_timer.start(0)
+
+    def simulation_tick(self):
+        # as many iterations as fit in the frame budget, then the vertices are moved and the event loop can paint and handle input
+        start = time.perf_counter()
+        while time.perf_counter() - start < self.simulation_frame_budget and not all(simulation.done for simulation in self.simulations):
+            for simulation in self.simulations:
+                if not simulation.done:
+                    simulation.step()
+
+        self.move_vertices()
+        self.status.showMessage("Live force simulation at iteration " + str(max(simulation.iteration_count for simulation in self.simulations)) + ", press L to stop")
+
+        if all(simulation.done for simulation in self.simulations):
+            self.stop_live_simulation()
+
+    def stop_live_simulation(self, update = True):
+        self.simulation_timer.stop()
+        self.live_simulation_action.setChecked(False)
+        for simulation in self.simulations:
+            simulation.finish()
+        if self.simulations:
+            print("live force simulation stopped after", max(simulation.iteration_count for simulation in self.simulations), "iterations")
+        self.simulations = []
+        if update:
+            self.regenerate(same_positions = True)
+            self.status.showMessage("Live force simulation stopped")
+
     def toggle_dynamic_forces(self):
         self.dynamic_forces = not self.dynamic_forces
 
+    def toggle_local_relaxation(self):
+        self.local_relaxation = not self.local_relaxation
+
+    def relax_around_vertex(self, vertex):
+        """
+        after vertex has been dragged, moves only the nodes near it with a force layout and keeps all other nodes in place (see main.relax_force_layout_locally)
+        """
+        if self.simulation_timer.isActive():
+            self.stop_live_simulation(update = False)
+        if self.strict_force_binding == True:
+            width = self.screenwidth - 50 - self.node_radius * 2
+            height = self.screenheight - 75 - self.node_radius * 2
+        else:
+            width = self.scene.width()
+            height = self.scene.height()
+
+        index = vertex.subgraph
+        self.coordinates[index], relaxed_ids = main.relax_force_layout_locally(width, height, self.coordinates[index], self.adjacency_dict[index], [vertex.id], pinned = self.pinned_ids)
+        print("relaxed", len(relaxed_ids), "nodes around node", vertex.id)
+        self.move_vertices(relaxed_ids)
+        self.update_status()
+
+    def toggle_pin(self, vertex):
+        """
+        pins or unpins vertex. the force layouts that start from the current layout (apply force direction, the live simulation and the
+        dynamic forces) do not move pinned nodes, layouts that are generated from scratch place all nodes
+        """
+        vertex.pinned = not vertex.pinned
+        if vertex.pinned:
+            self.pinned_ids.add(vertex.id)
+        else:
+            self.pinned_ids.discard(vertex.id)
+        vertex.update()
+        self.status.showMessage(str(len(self.pinned_ids)) + " pinned nodes")
+
+    def toggle_pin_dragged_nodes(self):
+        self.pin_dragged_nodes = not self.pin_dragged_nodes
+
+    def unpin_all(self):
+        for vertex_id in self.pinned_ids:
+            self.all_vertices[vertex_id].pinned = False
+            self.all_vertices[vertex_id].update()
+        self.pinned_ids = set()
+        self.status.showMessage("All nodes unpinned")
+
     def toggle_nontree_edge_display(self):
         self.display_non_tree_edges = not self.display_non_tree_edges
         if self.check_for_tree_layout() == True:
@@ -1978,13 +2235,14 @@ class MainWindow(QMainWindow):
         self.scene.update()
 
     def depth_first_search(self, root, index = 0):      # time complexity of DFS is O(2E) = O(E)
-        root_id = root
-        self.dfs = [(root_id, root_id)]
+        self.dfs = []
       #  self.max_depth = []
-        visited = [root_id]
-        self.depth_first_search_next(self.vertices[index][root_id], visited)
-        if len(self.dfs) < len(self.vertices[index].keys()):
-            print("WARNING: There are", len(self.vertices[index].keys()) - len(self.dfs),"nodes in the",self.layout, "graph that are not connected with the rest, these are currently not displayed")
+        visited = set()
+        for root_id in self.search_roots(root, index):      # a new tree for every connected component that is not reached yet
+            if root_id not in visited:
+                self.dfs.append((root_id, root_id))
+                visited.add(root_id)
+                self.depth_first_search_next(self.vertices[index][root_id], visited, index)
 
         # if main.printing_mode:
         #     print("dfs order:",self.dfs)
@@ -1992,12 +2250,20 @@ class MainWindow(QMainWindow):
         self.dfs_list.append(self.dfs)
 
         return self.dfs
-        
+
+    def search_roots(self, root_id, index = 0):
+        """
+        the given root followed by all other nodes, the most connected first. searches that start a new tree from the next of these
+        that is not visited yet cover every connected component, with the trees in the order of main.split_forest
+        """
+        vertices = self.vertices[index]
+        return [root_id] + sorted((node_id for node_id in vertices if node_id != root_id), key = lambda node_id: len(vertices[node_id].edges), reverse = True)
+
     def depth_first_search_exhaustive(self, dfs_trees = None, root = "most connected", given_root_id = None, visited = None, index = 0):      # time complexity of DFS is O(2E) = O(E)
         if given_root_id != None:
             root_id = given_root_id
         elif root == "most connected":
-            root_id = main.most_connected_node_id[index]
+            root_id = self.graph.most_connected_node_id[index]
         else:
             raise ValueError ("No root given for exhaustive dfs")
     #    print("root id becomes", root_id)
@@ -2005,12 +2271,12 @@ class MainWindow(QMainWindow):
             dfs_trees = []
         self.dfs = [(root_id, root_id)]
         if visited == None:
-            visited = [root_id]
+            visited = {root_id}
         else:
-            visited.append(root_id)
+            visited.add(root_id)
             # print("appending",root_id,"to visited")
       #  print("visited is",visited)
-        self.depth_first_search_next(self.vertices[index][root_id], visited)
+        self.depth_first_search_next(self.vertices[index][root_id], visited, index)
 
         dfs_trees.append(self.dfs)
 
@@ -2023,7 +2289,7 @@ class MainWindow(QMainWindow):
                     break
             # print("visited list is",visited)
 
-            self.depth_first_search_exhaustive(dfs_trees, given_root_id = new_root, visited = visited)
+            self.depth_first_search_exhaustive(dfs_trees, given_root_id = new_root, visited = visited, index = index)
         else:
             # if main.printing_mode:
             #     print("exhaustive dfs order:",self.dfs_trees)
@@ -2033,38 +2299,39 @@ class MainWindow(QMainWindow):
         return self.dfs_trees
     
     #global max_depth
-    def depth_first_search_next(self, vertex, visited):  
+    def depth_first_search_next(self, vertex, visited, index = 0):  
        # self.dfs.append(vertex.id)
         for (edge, next) in vertex.edges:
-            if next.id not in visited:
+            if next.id not in visited and next.id in self.vertices[index]:      # edges to other subgraphs are not followed
                 self.dfs.append((vertex.id, next.id))
-                visited.append(next.id)
-                self.depth_first_search_next(next, visited)
+                visited.add(next.id)
+                self.depth_first_search_next(next, visited, index)
 
     def breadth_first_search(self, root = "most connected", index = 0):
         if root == "most connected":
-            root_id = main.most_connected_node_id
+            root_id = self.graph.most_connected_node_id[index]
         else:
             root_id = root
         self.bfs = []
-        queue = [(root_id, root_id)]
-        visited = [root_id]
-        while queue:
-            vertex_id, parent_id = queue.pop() # remove first vertex of the queue -> pop(0)
-            if main.printing_mode:
-                print("Vertex_id, parent_id: ", vertex_id, parent_id)
-            self.bfs.append((parent_id, vertex_id)) #keep track of the visited vertices
-            for (edge, next) in self.vertices[index][vertex_id].edges:
-                if next.id not in visited: #if vertex not visited, append to visited
-                    visited.append(next.id)
-                    queue.append((next.id, vertex_id)) # its ID and
+        visited = set()
+        for tree_root_id in self.search_roots(root_id, index):     # a new tree for every connected component that is not reached yet
+            if tree_root_id in visited:
+                continue
+            queue = [(tree_root_id, tree_root_id)]
+            visited.add(tree_root_id)
+            while queue:
+                vertex_id, parent_id = queue.pop() # remove first vertex of the queue -> pop(0)
+                if main.printing_mode:
+                    print("Vertex_id, parent_id: ", vertex_id, parent_id)
+                self.bfs.append((parent_id, vertex_id)) #keep track of the visited vertices
+                for (edge, next) in self.vertices[index][vertex_id].edges:
+                    if next.id not in visited and next.id in self.vertices[index]: #if vertex not visited (and in this subgraph), append to visited
+                        visited.add(next.id)
+                        queue.append((next.id, vertex_id)) # its ID and
 
         if main.printing_mode:
             print("bfs order:", self.bfs)
 
-        if len(self.bfs) < len(self.vertices[index].keys()):
-            print("WARNING: There are", len(self.vertices[index].keys()) - len(self.bfs),"nodes in the",self.layout, "graph that are not connected with the rest, these are currently not displayed")
-
         self.bfs_list.append(self.bfs)
             
         return self.bfs
@@ -2073,40 +2340,41 @@ class MainWindow(QMainWindow):
 
     def prims_algorithm(self, root = "most connected", index = 0):
         if root == "most connected":
-            root_id = main.most_connected_node_id
+            root_id = self.graph.most_connected_node_id[index]
         else:
             root_id = root
 
-        self.prims = [(root_id, root_id)]
-        visited = [root_id] 
-        distances = {}
-        #distances = queue.PriorityQueue()  maybe change it to priorityqueue after it's done for performance reasons
-        for (edge, next) in self.vertices[index][root_id].edges:
-            distances[next.id] = (edge.weight, root_id)     # (distance, parent)
-
-        while (len(self.prims) != len(self.vertices[index].keys())):       # make sure no duplicates go into self.prims
-            if len(distances.keys()) == 0:      # if there are no more vertices to check (dictionary is empty)
-                print("WARNING: There are",len(self.vertices[index].keys()) - len(self.prims),"nodes in the",self.layout, "graph that are not connected with the rest, these are currently not displayed")
-                break
-                #raise ValueError ("There are nodes in the graph that are not connected with the rest")
-
-            min_dist = None
-            min_node_id = None
-            min_node_parent = None
-
-            for node_id, (distance, parent) in distances.items():      # find minimum weight among nodes connected to MST
-                if (min_dist == None)  or (min_dist > distance):
-                    min_dist = distance
-                    min_node_id = node_id
-                    min_node_parent = parent
-            self.prims.append((min_node_parent, min_node_id))
-            visited.append(min_node_id)
-
-            del distances[min_node_id]
-
-            for (edge, next) in self.vertices[index][min_node_id].edges:   # add new neighbours of new mst node to checking dictionary
-                if next.id not in visited:
-                    distances[next.id] = (edge.weight, min_node_id)
+        self.prims = []
+        visited = set()
+        for tree_root_id in self.search_roots(root_id, index):     # a new tree for every connected component that is not reached yet
+            if tree_root_id in visited:
+                continue
+            self.prims.append((tree_root_id, tree_root_id))
+            visited.add(tree_root_id)
+            distances = {}
+            #distances = queue.PriorityQueue()  maybe change it to priorityqueue after it's done for performance reasons
+            for (edge, next) in self.vertices[index][tree_root_id].edges:
+                if next.id not in visited and next.id in self.vertices[index]:      # not a self loop or an edge to another subgraph
+                    distances[next.id] = (edge.weight, tree_root_id)     # (distance, parent)
+
+            while distances:        # until there are no more vertices to check in this connected component
+                min_dist = None
+                min_node_id = None
+                min_node_parent = None
+
+                for node_id, (distance, parent) in distances.items():      # find minimum weight among nodes connected to MST
+                    if (min_dist == None)  or (min_dist > distance):
+                        min_dist = distance
+                        min_node_id = node_id
+                        min_node_parent = parent
+                self.prims.append((min_node_parent, min_node_id))
+                visited.add(min_node_id)
+
+                del distances[min_node_id]
+
+                for (edge, next) in self.vertices[index][min_node_id].edges:   # add new neighbours of new mst node to checking dictionary
+                    if next.id not in visited and next.id in self.vertices[index]:
+                        distances[next.id] = (edge.weight, min_node_id)
 
         if main.printing_mode:
             print("prims order:", self.prims)
@@ -2122,12 +2390,48 @@ class MainWindow(QMainWindow):
 
 if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser(description = "Graph viewer app")
+    parser.add_argument("path", nargs = "?", default = main.default_path, help = "dot file to load, see the data folder")
+    parser.add_argument("--directed", action = "store_true", default = None, help = "read the graph as directed (default: taken from the file)")
+    parser.add_argument("--subgraphs", action = "store_true", default = None, help = "split the graph into its dot subgraphs (default: taken from the file)")
+    parser.add_argument("--include-n", action = "store_true", help = "keep the '\\\\n' node, needed for the layered layouts of the league and test networks")
+    parser.add_argument("--parser", default = "stream", choices = ["stream", "pydot"], help = "dot reader used when the graph is not cached yet")
+    parser.add_argument("--layout", default = "random", help = "initial layout")
+    parser.add_argument("--repulsion", default = main.force_repulsion, choices = ["exact", "barnes_hut", "grid"], help = "repulsion used by the force directed layouts")
+    parser.add_argument("--theta", type = float, default = main.barnes_hut_theta, help = "opening angle of the barnes_hut repulsion, larger is faster and less exact")
+    parser.add_argument("--cutoff", type = float, default = main.grid_cutoff, help = "the grid repulsion ignores nodes further away than this many ideal edge lengths")
+    parser.add_argument("--profile", nargs = "?", const = "table", default = os.environ.get(main.profile_env_var),
+                        help = "profile time and peak memory of the startup phases, print a table or write to the given .json file (also set by " + main.profile_env_var + ")")
+    parser.add_argument("--seed", type = int, default = main.layout_seed, help = "seed of every randomized layout, the seed of a layout is shown in the status bar (default: a new seed per layout)")
+    args = parser.parse_args()
+    main.layout_seed = args.seed
+    main.force_repulsion = args.repulsion
+    main.barnes_hut_theta = args.theta
+    main.grid_cutoff = args.cutoff
+
+    # the summary of the startup times is always printed, memory is only tracked when profiling
+    profile_output = args.profile if args.profile not in (None, "", "0") else None
+    main.startup_profiler = main.StartupProfiler(track_memory = profile_output is not None)
+    main.startup_profiler.add_phase("imports", time.perf_counter() - startup_time)
+
+    graph = main.load_graph(args.path, directed = args.directed, subgraphs = args.subgraphs, include_n = args.include_n, parser = args.parser)
+
     # Qt Application
-    app = QApplication(sys.argv)
+    app = QApplication(sys.argv[:1])
 
-    window = MainWindow(main.adjacency_dict_list, "random", default_radius=10)
+    with main.profile_phase("create window"):
+        window = MainWindow(graph, args.layout, default_radius=10)
+    show_time = time.perf_counter()
     window.show()
 
+    def report_startup():
+        # runs once the event loop is idle, so after the first frame has been painted
+        main.startup_profiler.add_phase("show until first paint", time.perf_counter() - show_time)
+        main.startup_profiler.report(profile_output if profile_output != "table" else None)
+        main.startup_profiler = None
+
+    QTimer.singleShot(0, report_startup)
+
     
 
     sys.exit(app.exec())
\ No newline at end of file
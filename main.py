@@ -1,89 +1,1044 @@
-import networkx
-import pydot
 import numpy as np
-import scipy
+import hashlib
+import importlib
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import array
+import glob
+import json
 import math
 import copy
+import tracemalloc
 
 import queue
 import statistics
 
 from PySide6.QtCore import QPointF
-from collections import defaultdict
-from sklearn.manifold import TSNE, Isomap, MDS
+from collections import defaultdict, deque
+from collections.abc import Mapping, MutableMapping
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
 
 # settings
 printing_mode = False
-subgraphs_included = False    #set to False when loading a graph without subgraphs, True otherwise
-include_n = False          # set to True when loading layered layouts for pro league network and test network, False for small directed network
-
+force_engine = "numpy"                    # "numpy" computes the forces of all nodes at once with arrays, "python" is the original loop per node
+force_repulsion = "exact"                 # "exact" sums the repulsion over all pairs, "barnes_hut" approximates far away groups of nodes by their center, "grid" ignores far away nodes (numpy engine only)
+barnes_hut_theta = 0.5                    # opening angle, a quadtree cell is approximated when its size over its distance is below this
+grid_cutoff = 2                           # the grid repulsion ignores nodes further away than this many ideal edge lengths (calc_ideal_length)
+force_plateau_window = 10                 # the numpy force engine stops early when the net displacement over the last window iterations
+force_plateau_tolerance = 0.1             # differs less than this fraction from the window before, 0 turns this off (see displacement_plateau)
+force_plateau_jitter = 0.2                # and the nodes get less than this fraction of the distance they move anywhere
+force_trace = deque(maxlen = 1000)        # statistics of the iterations of the last numpy force layout, see print_force_trace
+best_of_seeds = 4                         # number of random starts of the best-of force layout, see create_best_force_layout_coordinates
+best_of_parallel_nodes = 200              # graphs with fewer nodes run the random starts of the best-of force layout one after another, a process pool costs more than it saves
+best_of_measure = "crossings"             # quality measure used to pick the best of them, "crossings" or "stress"
+local_relaxation_hops = 2                 # after dragging a node, only the nodes this many edges away from it are moved, see relax_force_layout_locally
+local_relaxation_max_nodes = 200          # but no further hop is taken when it would move more nodes than this, around hubs the first hop can already be large
+stress_tolerance = 1e-4                   # the stress majorization stops when an iteration lowers the stress by less than this fraction, see create_stress_majorization_coordinates
+pivot_mds_pivots = 200                    # number of pivot nodes of the pivot MDS layout, see create_pivot_mds_coordinates
+component_gap = 40                        # pixels between the connected components, which are laid out on their own, see create_component_layout
+component_parallel_nodes = 1000           # components with at least this many nodes are laid out in parallel processes, see layout_components
+layout_seed = None                        # seed of the layouts the window generates, None draws a new seed for every layout, see layout_rng
+
+# datasets in the data folder, load one with load_graph(path)
 #undirected graphs
-G = networkx.Graph(networkx.nx_pydot.read_dot('data/LesMiserables.dot'))
-#G = networkx.Graph(networkx.nx_pydot.read_dot('data/JazzNetwork.dot'))
-#G = networkx.Graph(networkx.nx_pydot.read_dot('data/rome.dot'))
-
+#   data/LesMiserables.dot, data/JazzNetwork.dot, data/rome.dot
 #directed graphs
-#G = networkx.DiGraph(networkx.nx_pydot.read_dot('data/noname.dot')) # this is the small directed network, set include_n = False for this one
-#G = networkx.DiGraph(networkx.nx_pydot.read_dot('data/LeagueNetwork.dot')) # need include_n = True for this one
-#G = networkx.DiGraph(networkx.nx_pydot.read_dot('data/testnetwork.dot'))
+#   data/noname.dot (the small directed network), data/LeagueNetwork.dot (needs include_n = True), data/testnetwork.dot
+#graphs with subgraphs
+#   data/devonshiredebate_withonlytwoclusters.dot, data/polblogs_subgraphed.dot
+default_path = 'data/LesMiserables.dot'
 
-if subgraphs_included == True:
-    A = pydot.graph_from_dot_file('data/devonshiredebate_withonlytwoclusters.dot') 
-    #A = pydot.graph_from_dot_file('data/polblogs_subgraphed.dot')
 
-    subgraphs = A[0].get_subgraphs()
+graph_cache_dir = '.graph_cache'          # parsed dot files are stored here as graph stores (see save_graph_store), set to None to always parse
+graph_cache_version = 2                   # increase when the arrays stored in the cache change
+
+# networkx, pydot, scipy, sklearn and matplotlib take seconds to import, they are imported by lazy_import
+# the first time a layout or metric needs them
+import_times = {}                         # module name --> seconds it took to import it
+
+
+def lazy_import(name):
+    """
+    input: a module name like "sklearn.manifold"
+    output: the module, imported now if this is the first time it is needed
+    """
+    if name not in sys.modules:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        import_times[name] = time.perf_counter() - start
+        if printing_mode:
+            print(f"imported {name} in {import_times[name]:.2f} s")
+    return sys.modules[name]
+
+
+profile_env_var = "DATAVIS_PROFILE"       # set to 1 to print the startup profile, or to a .json path to write it there
+startup_profiler = None                   # the StartupProfiler of the running application, see profile_phase
+
+
+class StartupProfiler:
+    """
+    records the wall time of each startup phase, and with track_memory also the peak memory
+    allocated during it (through tracemalloc, which makes everything a bit slower).
+    phases can be nested, a nested phase is part of the time and memory of the phase around it
+    """
+    def __init__(self, track_memory = False):
+        self.track_memory = track_memory
+        self.phases = []                  # list of (phase name, depth, seconds, peak bytes or None), in the order the phases end
+        self.running = []                 # [memory at the start, highest memory seen so far] of each running phase
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def phase(self, name):
+        depth = len(self.running)
+        if self.track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self.running:
+                self.running[-1][1] = max(self.running[-1][1], peak)        # reset_peak below would lose the peak of the outer phase
+            tracemalloc.reset_peak()
+            self.running.append([current, current])
+        else:
+            self.running.append(None)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            memory = self.running.pop()
+            peak = None
+            if self.track_memory:
+                highest = max(memory[1], tracemalloc.get_traced_memory()[1])
+                peak = highest - memory[0]
+                if self.running:
+                    self.running[-1][1] = max(self.running[-1][1], highest)
+            self.phases.append((name, depth, seconds, peak))
+
+    def add_phase(self, name, seconds, peak = None):
+        self.phases.append((name, len(self.running), seconds, peak))
+
+    def total_seconds(self):
+        return sum(seconds for name, depth, seconds, peak in self.phases if depth == 0)
+
+    def to_dict(self):
+        return {"phases": [{"name": name, "depth": depth, "seconds": seconds, "peak_bytes": peak} for name, depth, seconds, peak in self.phases],
+                "total_seconds": self.total_seconds(),
+                "lazy_imports": dict(import_times)}
+
+    def report(self, output = None):
+        """
+        prints the phases as a table, or writes them as json when output is a path ending in .json
+        """
+        if output is not None and output.endswith(".json"):
+            with open(output, "w") as f:
+                json.dump(self.to_dict(), f, indent = 2)
+            print("startup profile written to", output)
+            return
+
+        print("startup timing:")
+        for name, depth, seconds, peak in self.phases:
+            memory = f" {peak / 2**20:9.1f} MB peak" if peak is not None else ""
+            print(f"  {'  ' * depth + name:<28} {seconds:7.2f} s{memory}")
+        print(f"  {'total':<28} {self.total_seconds():7.2f} s")
+        if import_times:
+            for name, seconds in import_times.items():
+                print(f"  {'import ' + name:<28} {seconds:7.2f} s")
+        else:
+            print("  no modules imported on first use yet")
+
+
+def profile_phase(name):
+    """
+    times the block as a phase of the startup profiler, does nothing when no profiler is running
+    """
+    if startup_profiler is None:
+        return nullcontext()
+    return startup_profiler.phase(name)
+
+
+class GraphData:
+    """
+    a loaded graph, built from the arrays returned by read_dot_arrays: node_ids[i] is the id of node i,
+    edge i goes from node edge_src[i] to node edge_dst[i] with weight edge_weights[i],
+    and clusters[i] is the index of the subgraph that node i belongs to (-1 if the file has no subgraphs).
+    every layout and window works on one of these instead of module globals, so several graphs can live in one process.
+    the arrays may be memory mapped from a graph store, they are then only read from disk when they are used
+    """
+    def __init__(self, path, graph_arrays, include_n = False):
+        self.path = path
+        self.node_ids = graph_arrays["node_ids"].tolist()
+        self.edge_src = graph_arrays["edge_src"]
+        self.edge_dst = graph_arrays["edge_dst"]
+        self.edge_weights = graph_arrays["edge_weights"]
+        self.weighted = bool(graph_arrays["weighted"])
+        self.directed = bool(graph_arrays["directed"])
+        self.clusters = graph_arrays["clusters"]
+        self.cluster_names = graph_arrays["cluster_names"].tolist()
+        self.node_index = {id: i for i, id in enumerate(self.node_ids)}        # the interning table, node id --> integer used by the layers
+        self.include_n = include_n
+        self.subgraphs_included = len(self.cluster_names) > 0
+
+        self.csr_list = []
+        self.adjacency_dict_list = []
+        self.interlayer_csr = None
+        self.interlayer_adjacency_dict = None          # edges between different subgraphs, None for graphs without subgraphs
+        self.adjacencies = []
+        self.most_connected_node_id = []
+        self._G = None
+        self._subgraphs_list = None
+
+        # the '\\n' node is only kept when include_n is set, edges touching it are dropped with it
+        keep = np.ones(len(self.node_ids), dtype = bool)
+        if not include_n and "\\n" in self.node_ids:
+            keep[self.node_ids.index("\\n")] = False
+        weights = adjacency_weights(graph_arrays)
+
+        if not self.subgraphs_included:
+            if "csr_indptr" in graph_arrays and keep.all():
+                # the graph store holds the adjacency of the whole graph already, use it as it is on disk
+                self.add_csr(CSRGraph(self.node_ids, np.arange(len(self.node_ids)), graph_arrays["csr_indptr"], graph_arrays["csr_indices"],
+                                      graph_arrays["csr_rendered"], graph_arrays["csr_weights"]))
+            else:
+                self.add_layer(np.flatnonzero(keep), np.arange(len(self.edge_src)), weights)
+        else:
+            self.partition_edges()
+            for index in range(len(self.cluster_names)):
+                if printing_mode:
+                    print("adding nodes and edges of subgraph", index)
+                nodes = self.cluster_nodes(index)
+                self.add_layer(nodes[keep[nodes]], self.cluster_edges(index), weights)
+
+            # the interlayer layer only holds the nodes which have interlayer edges
+            inter = self.inter_edges[keep[self.edge_src[self.inter_edges]] & keep[self.edge_dst[self.inter_edges]]]
+            has_edges = np.zeros(len(self.node_ids), dtype = bool)
+            has_edges[self.edge_src[inter]] = True
+            has_edges[self.edge_dst[inter]] = True
+            self.add_layer(np.flatnonzero(has_edges), inter, weights, interlayer = True)
+
+        if printing_mode:
+            print("adjacency_dict_list:", self.adjacency_dict_list)
+
+    def partition_edges(self):
+        """
+        sorts the nodes and edges by subgraph in one pass: intra_edges are the edges within a subgraph, grouped by subgraph,
+        and inter_edges are the edges between two subgraphs (or touching a node that is in no subgraph)
+        """
+        nr_clusters = len(self.cluster_names)
+        src_cluster = self.clusters[self.edge_src]
+        intra = (src_cluster == self.clusters[self.edge_dst]) & (src_cluster != -1)
+
+        self.intra_edges = np.flatnonzero(intra)
+        self.intra_edges = self.intra_edges[np.argsort(src_cluster[self.intra_edges], kind = "stable")]
+        self.intra_edge_ptr = np.zeros(nr_clusters + 1, dtype = np.int64)
+        np.cumsum(np.bincount(src_cluster[self.intra_edges], minlength = nr_clusters), out = self.intra_edge_ptr[1:])
+        self.inter_edges = np.flatnonzero(~intra)
+
+        in_cluster = np.flatnonzero(self.clusters != -1)
+        self.cluster_node_order = in_cluster[np.argsort(self.clusters[in_cluster], kind = "stable")]
+        self.cluster_node_ptr = np.zeros(nr_clusters + 1, dtype = np.int64)
+        np.cumsum(np.bincount(self.clusters[in_cluster], minlength = nr_clusters), out = self.cluster_node_ptr[1:])
+
+    def cluster_nodes(self, index):
+        return self.cluster_node_order[self.cluster_node_ptr[index]:self.cluster_node_ptr[index+1]]
+
+    def cluster_edges(self, index):
+        return self.intra_edges[self.intra_edge_ptr[index]:self.intra_edge_ptr[index+1]]
+
+    def add_layer(self, nodes, edges, weights, interlayer = False):
+        """
+        nodes are the indices of the nodes in this layer, edges the indices of the edges in this layer
+        """
+        local_index = np.full(len(self.node_ids), -1, dtype = np.int64)
+        local_index[nodes] = np.arange(len(nodes))
+        edges = edges[(local_index[self.edge_src[edges]] != -1) & (local_index[self.edge_dst[edges]] != -1)]
+        csr = CSRGraph.from_edges([self.node_ids[n] for n in nodes.tolist()], nodes, local_index[self.edge_src[edges]], local_index[self.edge_dst[edges]], weights[edges])
+        self.add_csr(csr, interlayer)
+
+    def add_csr(self, csr, interlayer = False):
+        if interlayer:
+            self.interlayer_csr = csr
+            self.interlayer_adjacency_dict = AdjacencyView(csr)
+            return
+        self.csr_list.append(csr)
+        self.adjacency_dict_list.append(AdjacencyView(csr))
+        adjacencies = dict(zip(csr.node_ids, csr.degrees().tolist()))
+        self.adjacencies.append(adjacencies)
+        self.most_connected_node_id.append(max(zip(adjacencies.values(), adjacencies.keys()), default = (0, None))[1]) #retrieve id with max adjacency, add to list
+
+    def get_weights(self):
+        # unweighted graphs get weight 1 on every edge
+        if self.weighted:
+            return self.edge_weights.tolist()
+        return [1] * len(self.edge_src)
+
+    def cluster_node_ids(self, index):
+        return [self.node_ids[n] for n in self.cluster_nodes(index).tolist()]
+
+    @property
+    def G(self):
+        """
+        the networkx graph, only built when a function needs it (floyd warshall, projections);
+        for graphs with subgraphs this is the first subgraph
+        """
+        if self._G is None:
+            if self.subgraphs_included:
+                self._G = self.subgraphs_list[0]
+            else:
+                self._G = create_networkx_graph(self.node_ids, self.edge_src, self.edge_dst, self.get_weights(), self.directed, self.weighted)
+        return self._G
+
+    @property
+    def subgraphs_list(self):
+        """
+        one networkx digraph per subgraph, containing the edges within that subgraph
+        """
+        if self._subgraphs_list is None:
+            self._subgraphs_list = []
+            weights = np.asarray(self.get_weights())
+            for index in range(len(self.cluster_names)):
+                edges = self.cluster_edges(index)
+                self._subgraphs_list.append(create_networkx_graph(self.node_ids, self.edge_src[edges], self.edge_dst[edges], weights[edges].tolist(),
+                                                                  True, self.weighted, nodes = self.cluster_nodes(index)))
+        return self._subgraphs_list
+
+
+class CSRGraph:
+    """
+    the adjacency of one layer in compressed sparse row form. node i of the layer has id node_ids[i] and
+    is node nodes[i] of the whole graph, and its edges are stored at positions indptr[i] to indptr[i+1] of indices (the neighbour), weights and rendered.
+    like in the adjacency dicts every edge u-->v is stored twice: at u with rendered True and at v with rendered False,
+    and the edges of a node are kept in the order of the edge list
+    """
+    def __init__(self, node_ids, nodes, indptr, indices, rendered, weights):
+        self.node_ids = node_ids
+        self.nodes = nodes
+        self.node_index = {id: i for i, id in enumerate(node_ids)}
+        self.indptr = indptr
+        self.indices = indices
+        self.rendered = rendered
+        self.weights = weights
+
+    @classmethod
+    def from_edges(cls, node_ids, nodes, edge_src, edge_dst, edge_weights):
+        """
+        builds the layer from an edge list, edge_src and edge_dst are indices into node_ids
+        """
+        nr_edges = len(edge_src)
+
+        owner = np.empty(2 * nr_edges, dtype = np.int64)
+        owner[0::2] = edge_src
+        owner[1::2] = edge_dst
+        neighbour = np.empty(2 * nr_edges, dtype = np.int32)
+        neighbour[0::2] = edge_dst
+        neighbour[1::2] = edge_src
+        rendered = np.zeros(2 * nr_edges, dtype = bool)
+        rendered[0::2] = True
+
+        order = np.argsort(owner, kind = "stable")
+        indptr = np.zeros(len(node_ids) + 1, dtype = np.int64)
+        np.cumsum(np.bincount(owner, minlength = len(node_ids)), out = indptr[1:])
+        return cls(node_ids, nodes, indptr, neighbour[order], rendered[order], np.repeat(np.asarray(edge_weights), 2)[order])
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    def degrees(self):
+        return np.diff(self.indptr)
+
+    def neighbours(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i+1]]
+
+    def edge_arrays(self):
+        """
+        output: source and target index of every edge once (the rendered direction) and its weight
+        """
+        src = np.repeat(np.arange(len(self.node_ids), dtype = np.int32), self.degrees())
+        return src[self.rendered], self.indices[self.rendered], self.weights[self.rendered]
+
+    def edge_tuples(self, i):
+        start, end = self.indptr[i], self.indptr[i+1]
+        return list(zip([self.node_ids[j] for j in self.indices[start:end].tolist()], self.rendered[start:end].tolist(), self.weights[start:end].tolist()))
+
+    def subgraph(self, node_ids):
+        """
+        input: ids of nodes that are closed under adjacency, like a connected component
+        output: CSRGraph of only these nodes and their edges, in the given order
+        """
+        rows = np.fromiter((self.node_index[id] for id in node_ids), dtype = np.int64, count = len(node_ids))
+        new_index = np.full(len(self.node_ids), -1, dtype = np.int64)
+        new_index[rows] = np.arange(len(rows))
+        degrees = self.degrees()[rows]
+        indptr = np.zeros(len(rows) + 1, dtype = np.int64)
+        np.cumsum(degrees, out = indptr[1:])
+        positions = np.repeat(self.indptr[rows] - indptr[:-1], degrees) + np.arange(indptr[-1])
+        return CSRGraph(list(node_ids), np.asarray(self.nodes)[rows], indptr, new_index[self.indices[positions]].astype(self.indices.dtype),
+                        self.rendered[positions], self.weights[positions])
+
+    def interned_adjacency(self):
+        """
+        output: adjacency dict of the layer with the node indices as ids, see intern_adjacency
+        """
+        indptr = self.indptr.tolist()
+        edges = list(zip(self.indices.tolist(), self.rendered.tolist(), self.weights.tolist()))
+        return {i: edges[indptr[i]:indptr[i+1]] for i in range(len(self.node_ids))}
+
+
+class AdjacencyView(Mapping):
+    """
+    read only adjacency dict on top of a CSRGraph, id --> list of (neighbour id, rendered, weight) tuples.
+    the lists are built when they are asked for, so code that changes them has to copy the dict first (see to_dict)
+    """
+    def __init__(self, csr):
+        self.csr = csr
+
+    def __getitem__(self, id):
+        return self.csr.edge_tuples(self.csr.node_index[id])
+
+    def __iter__(self):
+        return iter(self.csr.node_ids)
+
+    def __len__(self):
+        return len(self.csr.node_ids)
+
+    def __contains__(self, id):
+        return id in self.csr.node_index
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def to_dict(self):
+        return {id: self.csr.edge_tuples(i) for i, id in enumerate(self.csr.node_ids)}
 
-    subgraph_youngest = subgraphs[0]
-    subgraph_gap = subgraphs[1]
+class LayoutState(MutableMapping):
+    """
+    the coordinates of a layout as contiguous x and y arrays, node node_ids[i] is at (x[i], y[i]).
+    it can be used like the coordinates dicts of id --> (x, y), but the numpy engines move the nodes by updating the arrays
+    in place, and the window and the metrics read the arrays directly. seed is the seed of the randomized layout that made it
+    (see layout_rng), passing it to the same layout function again gives the same layout
+    """
+    def __init__(self, node_ids, x = None, y = None, seed = None):
+        self.node_ids = list(node_ids)
+        self.seed = seed
+        self.node_index = {id: i for i, id in enumerate(self.node_ids)}
+        self.x = np.zeros(len(self.node_ids)) if x is None else np.ascontiguousarray(x, dtype = float)
+        self.y = np.zeros(len(self.node_ids)) if y is None else np.ascontiguousarray(y, dtype = float)
+
+    @classmethod
+    def from_coordinates(cls, coordinates):
+        """
+        input: a coordinates dict or LayoutState
+        output: a LayoutState with the same coordinates, the given one if it already is a LayoutState
+        """
+        if isinstance(coordinates, LayoutState):
+            return coordinates
+        coords = np.array(list(coordinates.values()), dtype = float).reshape(len(coordinates), 2)
+        return cls(coordinates.keys(), coords[:, 0], coords[:, 1])
+
+    def __getitem__(self, id):
+        i = self.node_index[id]
+        return (self.x[i].item(), self.y[i].item())
+
+    def __setitem__(self, id, coords):
+        i = self.node_index.get(id)
+        if i is None:
+            self.node_index[id] = len(self.node_ids)
+            self.node_ids.append(id)
+            self.x = np.append(self.x, coords[0])
+            self.y = np.append(self.y, coords[1])
+        else:
+            self.x[i] = coords[0]
+            self.y[i] = coords[1]
+
+    def __delitem__(self, id):
+        keep = np.arange(len(self.node_ids)) != self.node_index[id]
+        self.__init__([node_id for node_id in self.node_ids if node_id != id], self.x[keep], self.y[keep], self.seed)
+
+    def __iter__(self):
+        return iter(self.node_ids)
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    def __contains__(self, id):
+        return id in self.node_index
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
+    def items(self):
+        return list(zip(self.node_ids, zip(self.x.tolist(), self.y.tolist())))
+
+    def values(self):
+        return list(zip(self.x.tolist(), self.y.tolist()))
+
+    def copy(self):
+        return LayoutState(self.node_ids, self.x.copy(), self.y.copy(), self.seed)
+
+    def translate(self, xtrans = 0, ytrans = 0):
+        self.x += xtrans
+        self.y += ytrans
+
+    def indices(self, ids):
+        """
+        input: node ids
+        output: the positions of these nodes in the x and y arrays
+        """
+        return np.fromiter((self.node_index[id] for id in ids), dtype = np.int64, count = len(ids))
+
+
+def create_networkx_graph(node_ids, edge_src, edge_dst, weights, directed, weighted, nodes = None):
+    networkx = lazy_import("networkx")
+    if directed:
+        G = networkx.DiGraph()
+    else:
+        G = networkx.Graph()
+    if nodes is None:
+        G.add_nodes_from(node_ids)
+    else:
+        G.add_nodes_from(node_ids[n] for n in nodes)
+    for u, v, weight in zip(edge_src.tolist(), edge_dst.tolist(), weights):
+        if weighted:
+            G.add_edge(node_ids[u], node_ids[v], weight = weight)
+        else:
+            G.add_edge(node_ids[u], node_ids[v])
+    return G
+
+
+def load_graph(path, directed = None, subgraphs = None, include_n = False, use_cache = True, parser = "stream"):
+    """
+    input: path to a dot file; directed and subgraphs are read from the file when left as None,
+    include_n keeps the '\\\\n' node that the pydot import adds to some graphs,
+    parser is "stream" for the single pass reader (falls back to pydot for syntax it does not support) or "pydot"
+    output: a GraphData object holding everything the layouts need for this graph.
+    the parsed arrays are cached in graph_cache_dir, keyed by the content of the file, so later loads skip parsing.
+    path can also be a graph store directory written by write_graph_store, which is opened memory mapped
+    """
+    cache_path = None
+    graph_arrays = None
+    with profile_phase("read graph cache"):
+        if os.path.isdir(path):
+            graph_arrays = open_graph_store(path)
+            if graph_arrays is None:
+                raise ValueError("Not a graph store: " + path)
+        elif use_cache and graph_cache_dir is not None:
+            cache_path = graph_cache_path(path, directed, subgraphs)
+            graph_arrays = open_graph_store(cache_path)
+
+    if graph_arrays is None:
+        with profile_phase("parse dot file"):
+            graph_arrays = read_graph_arrays(path, directed, subgraphs, parser)
+            if cache_path is not None:
+                save_graph_store(cache_path, graph_arrays)
+    elif printing_mode:
+        print("loaded", path, "from cache", cache_path)
+
+    print("Data loaded")
+    with profile_phase("build adjacency"):
+        return GraphData(path, graph_arrays, include_n = include_n)
+
+
+def load_graphs(paths = "data/*.dot", directed = None, subgraphs = None, include_n = False, use_cache = True, parser = "stream", processes = None):
+    """
+    input: a list of dot files or a glob pattern, the other arguments are passed on as in load_graph,
+    processes is the number of worker processes (default: one per core)
+    output: dict of path --> GraphData, in the order of the paths.
+    the files are parsed in parallel and written to the cache by the workers, the graphs are then opened from the cache
+    (memory mapped) in this process, so only the store paths travel between the processes
+    """
+    if isinstance(paths, str):
+        paths = sorted(glob.glob(paths))
+    paths = list(dict.fromkeys(paths))          # a path given twice would be parsed and written to the cache by two workers at once
+
+    graphs = {}
+    with ProcessPoolExecutor(max_workers = processes) as executor:
+        futures = [executor.submit(ingest_graph_file, path, directed, subgraphs, use_cache, parser) for path in paths]
+        for path, future in zip(paths, futures):
+            try:
+                graph_arrays = future.result()
+            except (OSError, ValueError) as error:
+                print("WARNING: could not load", path, error)
+                continue
+            if isinstance(graph_arrays, str):
+                graph_arrays = open_graph_store(graph_arrays)
+            graphs[path] = GraphData(path, graph_arrays, include_n = include_n)
+    print("Data loaded:", len(graphs), "graphs")
+    return graphs
+
+
+def ingest_graph_file(path, directed, subgraphs, use_cache, parser):
+    """
+    worker of load_graphs: returns the path of the graph store in the cache, or the parsed arrays when not caching
+    """
+    if not use_cache or graph_cache_dir is None:
+        return read_graph_arrays(path, directed, subgraphs, parser)
+    cache_path = graph_cache_path(path, directed, subgraphs)
+    if not os.path.isdir(cache_path):
+        save_graph_store(cache_path, read_graph_arrays(path, directed, subgraphs, parser))
+        if not os.path.isdir(cache_path):           # the store could not be written
+            return read_graph_arrays(path, directed, subgraphs, parser)
+    return cache_path
+
+
+def graph_cache_path(path, directed = None, subgraphs = None):
+    """
+    the cache directory of a dot file, named after the hash of its content and the parse options
+    """
+    file_hash = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            file_hash.update(block)
+    file_hash.update(repr((graph_cache_version, directed, subgraphs)).encode())
+    return os.path.join(graph_cache_dir, os.path.basename(path) + "." + file_hash.hexdigest()[:20])
+
+
+def read_graph_arrays(path, directed = None, subgraphs = None, parser = "stream"):
+    """
+    parses a dot file with the given parser, see load_graph
+    """
+    if parser == "stream":
+        try:
+            return stream_dot_arrays(path, directed, subgraphs)
+        except ValueError as error:
+            print("streaming dot reader failed (" + str(error) + "), reading", path, "with pydot")
+            return read_dot_arrays(path, directed, subgraphs)
+    elif parser == "pydot":
+        return read_dot_arrays(path, directed, subgraphs)
+    else:
+        raise ValueError("Unsupported dot parser " + parser)
+
+
+# a graph store is a directory with one .npy file per array, so every array can be memory mapped on its own.
+# next to the arrays from read_dot_arrays it holds the adjacency of the whole graph in csr form (csr_*.npy)
+graph_store_arrays = ["node_ids", "edge_src", "edge_dst", "edge_weights", "weighted", "directed", "clusters", "cluster_names",
+                      "csr_indptr", "csr_indices", "csr_rendered", "csr_weights"]
+
+
+def adjacency_weights(graph_arrays):
+    # the weight stored in the adjacency, unweighted graphs get weight 1 on every edge
+    if graph_arrays["weighted"]:
+        return graph_arrays["edge_weights"]
+    return np.ones(len(graph_arrays["edge_src"]), dtype = np.int8)
+
+
+def save_graph_store(store_path, graph_arrays):
+    node_ids = graph_arrays["node_ids"]
+    csr = CSRGraph.from_edges(node_ids, None, graph_arrays["edge_src"], graph_arrays["edge_dst"], adjacency_weights(graph_arrays))
+    arrays = dict(graph_arrays, csr_indptr = csr.indptr, csr_indices = csr.indices, csr_rendered = csr.rendered, csr_weights = csr.weights)
+    # every writer gets its own temporary directory, so processes that write the same store at once (like the workers of load_graphs
+    # for two files with the same name and content) do not write into each other's files
+    parent = os.path.dirname(store_path) or "."
+    temp_path = None
+    try:
+        os.makedirs(parent, exist_ok = True)
+        temp_path = tempfile.mkdtemp(prefix = os.path.basename(store_path) + ".", suffix = ".tmp", dir = parent)
+        for key in graph_store_arrays:
+            np.save(os.path.join(temp_path, key + ".npy"), arrays[key])
+        try:
+            os.replace(temp_path, store_path)          # so a half written store is never read
+        except OSError:
+            if open_graph_store(store_path) is not None:
+                return                                 # another process has written the same store meanwhile
+            shutil.rmtree(store_path, ignore_errors = True)
+            os.replace(temp_path, store_path)
+    except OSError as error:
+        print("WARNING: could not write graph store", store_path, error)
+    finally:
+        if temp_path is not None:
+            shutil.rmtree(temp_path, ignore_errors = True)
+
+
+def open_graph_store(store_path):
+    """
+    returns the arrays of the graph store memory mapped, or None if there is no (readable) store
+    """
+    if not os.path.isdir(store_path):
+        return None
+    try:
+        graph_arrays = {}
+        for key in graph_store_arrays:
+            graph_arrays[key] = np.load(os.path.join(store_path, key + ".npy"), mmap_mode = "r", allow_pickle = False)
+        return graph_arrays
+    except (OSError, ValueError) as error:
+        print("WARNING: ignoring unreadable graph store", store_path, error)
+        return None
+
+
+def write_graph_store(path, store_path, directed = None, subgraphs = None, parser = "stream"):
+    """
+    input: path to a dot file and the directory to write its graph store to.
+    load_graph(store_path) then opens the graph without parsing and without reading all of it into memory,
+    which is meant for graphs too large to parse every time
+    """
+    save_graph_store(store_path, read_graph_arrays(path, directed, subgraphs, parser))
+
+
+def read_dot_arrays(path, directed = None, subgraphs = None):
+    """
+    parses a dot file with pydot and returns the node and edge arrays that GraphData is built from
+    """
+    networkx = lazy_import("networkx")
+    A = lazy_import("pydot").graph_from_dot_file(path)
+    if directed is None:
+        directed = A[0].get_type() == "digraph"
+    if subgraphs is None:
+        subgraphs = len(A[0].get_subgraphs()) > 0
+
+    if subgraphs == False:
+        if directed:
+            G = networkx.DiGraph(networkx.nx_pydot.from_pydot(A[0]))
+        else:
+            G = networkx.Graph(networkx.nx_pydot.from_pydot(A[0]))
+        return create_graph_arrays(list(G.nodes()), list(G.edges(data = True)), directed)
+
+    subgraphs = A[0].get_subgraphs()
     all_edges = A[0].get_edge_list()
     inter_layer_edges = []
 
+    # node --> index of the first subgraph it is declared in
+    node_cluster = {}
+    for index, subgraph in enumerate(subgraphs):
+        for node in subgraph.obj_dict["nodes"]:
+            node_cluster.setdefault(node, index)
 
     for edge in all_edges:
         source = edge.get_source()
         destination = edge.get_destination()
-        subgraph_youngest_nodes = subgraph_youngest.obj_dict["nodes"]
-        subgraph_gap_nodes = subgraph_gap.obj_dict["nodes"]
-        #print("source", source)
-        #print("destination", destination)
-        if source in subgraph_youngest_nodes and destination in subgraph_youngest_nodes:
-            subgraph_youngest.add_edge(edge)
-            #print("both nodes are in youngest")
-        elif source in subgraph_gap_nodes and destination in subgraph_gap_nodes:
-            subgraph_gap.add_edge(edge)
-            #print("both nodes are in gap")
+        index = node_cluster.get(source)
+        if index is not None and index == node_cluster.get(destination):
+            subgraphs[index].add_edge(edge)
         else:
-            inter_layer_edges.append((source, destination))
-            #print("nodes are in gap and youngest")
+            inter_layer_edges.append((source.strip('"'), destination.strip('"'), edge.get_attributes()))
+
+    node_ids = []
+    edges = []
+    clusters = []
+    for index, subgraph in enumerate(subgraphs):
+        G_sub = networkx.DiGraph(networkx.nx_pydot.from_pydot(subgraph))
+        node_ids += list(G_sub.nodes())
+        clusters += [index] * G_sub.number_of_nodes()
+        edges += list(G_sub.edges(data = True))
+    edges += inter_layer_edges
+    cluster_names = [subgraph.get_name().strip('"') for subgraph in subgraphs]
+
+    return create_graph_arrays(node_ids, edges, True, clusters, cluster_names)
 
-    #print("edges subgraph", subgraph_youngest.get_edges())
-    #print("edges subgraph", subgraph_gap.get_edges())
 
-    G_parent = networkx.DiGraph(networkx.nx_pydot.from_pydot(A[0]))
-    G_youngest = networkx.DiGraph(networkx.nx_pydot.from_pydot(subgraphs[0]))
-    G_gap = networkx.DiGraph(networkx.nx_pydot.from_pydot(subgraphs[1]))
-    subgraphs_list = [G_youngest, G_gap]
+def create_graph_arrays(node_ids, edges, directed, clusters = None, cluster_names = None):
+    """
+    input: a list of node ids, a list of (u, v, attribute dict) edges
+    output: the dict of arrays GraphData is built from, the graph is weighted if the first edge has a weight
+    """
+    node_index = {}
+    for index, node_id in enumerate(node_ids):
+        node_index.setdefault(node_id, index)
+
+    weighted = len(edges) > 0 and "weight" in edges[0][2]
+    edge_src = np.empty(len(edges), dtype = np.int32)
+    edge_dst = np.empty(len(edges), dtype = np.int32)
+    edge_weights = np.ones(len(edges))
+    for i, (u, v, data) in enumerate(edges):
+        edge_src[i] = node_index[u]
+        edge_dst[i] = node_index[v]
+        if weighted:
+            edge_weights[i] = float(str(data.get("weight", 1)).strip('"'))
+
+    if clusters is None:
+        clusters = np.full(len(node_ids), -1, dtype = np.int32)
+        cluster_names = []
+
+    return {
+        "node_ids": np.array(node_ids, dtype = str),
+        "edge_src": edge_src,
+        "edge_dst": edge_dst,
+        "edge_weights": edge_weights,
+        "weighted": np.array(weighted),
+        "directed": np.array(directed),
+        "clusters": np.asarray(clusters, dtype = np.int32),
+        "cluster_names": np.array(cluster_names, dtype = str),
+    }
+
+
+# tokens of the dot language, comments are matched so they can be skipped
+dot_token_pattern = re.compile(r'''\s*(?:
+      (?P<comment>//[^\n]*|\#[^\n]*|/\*.*?\*/)
+    | "(?P<quoted>(?:[^"\\]|\\.)*)"
+    | (?P<edgeop>->|--)
+    | (?P<id>[\w.\x80-\U0010ffff]+|-?(?:\.\d+|\d+(?:\.\d*)?))
+    | (?P<punct>[{}\[\];,=:+])
+    )''', re.VERBOSE | re.DOTALL)
+
+
+def dot_tokens(lines):
+    """
+    yields (kind, value) tokens from an iterable of lines, one line at a time.
+    a quoted string or comment that continues on the next line is kept until it is complete
+    """
+    pending = ""
+    for line_number, line in enumerate(lines, 1):
+        text = pending + line
+        pending = ""
+        pos = 0
+        while True:
+            match = dot_token_pattern.match(text, pos)
+            if match is None:
+                rest = text[pos:].lstrip()
+                if rest.startswith('"') or rest.startswith('/*'):
+                    pending = rest
+                elif rest:
+                    raise ValueError("unsupported dot syntax on line " + str(line_number) + ": " + rest[:40])
+                break
+            pos = match.end()
+            kind = match.lastgroup
+            if kind != "comment":
+                yield kind, match.group(kind)
+    if pending.strip():
+        raise ValueError("unterminated string or comment at the end of the dot file")
+
+
+class DotStreamReader:
+    """
+    single pass reader for the part of the dot language used in the data folder: node and edge statements,
+    the weight attribute of edges and (named) subgraph blocks. all other attributes are skipped without being stored.
+    nodes are interned to integers while reading and edges are kept in typed arrays,
+    so memory grows with the number of nodes and edges only
+    """
+    def __init__(self, lines):
+        self.tokens = dot_tokens(lines)
+        self.lookahead = []
+
+        self.node_index = {}            # node id -> index in order of first appearance
+        self.node_list = []
+        self.declared = []              # indices of nodes with a node statement, in declaration order
+        self.is_declared = array.array('b')
+        self.node_cluster = array.array('i')
+        self.edge_src = array.array('i')
+        self.edge_dst = array.array('i')
+        self.edge_weights = array.array('d')
+        self.first_edge_weighted = None
+
+        self.directed = False
+        self.cluster_names = []
+
+    def next(self):
+        if self.lookahead:
+            return self.lookahead.pop(0)
+        return next(self.tokens, (None, None))
+
+    def peek(self, offset = 0):
+        while len(self.lookahead) <= offset:
+            self.lookahead.append(next(self.tokens, (None, None)))
+        return self.lookahead[offset]
+
+    def expect(self, value):
+        kind, token = self.next()
+        if token != value or kind == "quoted":
+            raise ValueError("expected " + value + " in dot file but found " + str(token))
+
+    def is_keyword(self, token, keyword):
+        kind, value = token
+        return kind == "id" and value.lower() == keyword
+
+    def read(self):
+        if self.is_keyword(self.peek(), "strict"):
+            self.next()
+        kind, value = self.next()
+        if kind != "id" or value.lower() not in ("graph", "digraph"):
+            raise ValueError("dot file does not start with graph or digraph")
+        self.directed = value.lower() == "digraph"
+        if self.peek()[1] != "{":
+            self.next()                 # graph name
+        self.expect("{")
+        self.read_statements(cluster = -1, depth = 0)
+        return self
+
+    def read_statements(self, cluster, depth):
+        while True:
+            token = self.peek()
+            kind, value = token
+            if kind is None:
+                raise ValueError("dot file ends before the closing }")
+            if kind == "punct" and value == "}":
+                self.next()
+                return
+            if kind == "punct" and value in (";", ","):
+                self.next()
+            elif self.is_keyword(token, "subgraph") or (kind == "punct" and value == "{"):
+                self.read_subgraph(cluster, depth)
+            elif self.is_keyword(token, "graph") or self.is_keyword(token, "node") or self.is_keyword(token, "edge"):
+                self.next()
+                self.read_attributes()
+            elif kind in ("id", "quoted"):
+                self.read_node_or_edge(cluster)
+            else:
+                raise ValueError("unsupported dot statement starting with " + str(value))
+
+    def read_subgraph(self, cluster, depth):
+        name = None
+        if self.is_keyword(self.peek(), "subgraph"):
+            self.next()
+            if self.peek()[1] != "{" or self.peek()[0] == "quoted":
+                name = self.next()[1]
+        self.expect("{")
+        if depth == 0 and name is not None:          # only named subgraphs directly in the graph become clusters
+            self.cluster_names.append(name)
+            cluster = len(self.cluster_names) - 1
+        self.read_statements(cluster, depth + 1)
+
+    def read_node_id(self):
+        kind, value = self.next()
+        if kind not in ("id", "quoted"):
+            raise ValueError("expected a node id in dot file but found " + str(value))
+        while self.peek() == ("punct", ":"):         # ports are not used
+            self.next()
+            self.next()
+        index = self.node_index.get(value)
+        if index is None:
+            index = len(self.node_list)
+            self.node_index[value] = index
+            self.node_list.append(value)
+            self.is_declared.append(0)
+            self.node_cluster.append(-1)
+        return index
+
+    def read_node_or_edge(self, cluster):
+        if self.peek(1) == ("punct", "="):
+            # graph attribute statement (ID = ID), not used
+            self.next()
+            self.next()
+            self.next()
+            return
+        nodes = [self.read_node_id()]
+        while self.peek()[0] == "edgeop":
+            self.next()
+            if self.peek() == ("punct", "{"):
+                raise ValueError("edges to subgraphs are not supported by the streaming dot reader")
+            nodes.append(self.read_node_id())
+        attributes = self.read_attributes()
+
+        if len(nodes) == 1:
+            index = nodes[0]
+            if not self.is_declared[index]:
+                self.is_declared[index] = 1
+                self.declared.append(index)
+                self.node_cluster[index] = cluster
+            return
+
+        weight = attributes.get("weight")
+        if self.first_edge_weighted is None:
+            self.first_edge_weighted = weight is not None
+        weight = 1.0 if weight is None else float(weight)
+        for u, v in zip(nodes[:-1], nodes[1:]):
+            self.edge_src.append(u)
+            self.edge_dst.append(v)
+            self.edge_weights.append(weight)
+
+    def read_attributes(self):
+        """
+        skips attribute lists, only the weight attribute is returned
+        """
+        attributes = {}
+        while self.peek() == ("punct", "["):
+            self.next()
+            while True:
+                kind, value = self.next()
+                if kind is None:
+                    raise ValueError("dot file ends inside an attribute list")
+                if kind == "punct" and value == "]":
+                    break
+                if kind in ("id", "quoted") and self.peek() == ("punct", "="):
+                    self.next()
+                    attributes[value] = self.next()[1]
+        return {key: value for key, value in attributes.items() if key == "weight"}
+
 
-    G = G_youngest
+def stream_dot_arrays(path, directed = None, subgraphs = None):
+    """
+    reads a dot file in a single pass without pydot and returns the same arrays as read_dot_arrays.
+    the node and edge order follows the networkx graphs built by read_dot_arrays, so both give the same adjacency dicts
+    """
+    with open(path, encoding = "utf-8") as f:
+        reader = DotStreamReader(f).read()
+
+    if directed is None:
+        directed = reader.directed
+    if subgraphs is None:
+        subgraphs = len(reader.cluster_names) > 0
+
+    nr_nodes = len(reader.node_list)
+    node_cluster = np.frombuffer(reader.node_cluster, dtype = np.int32) if nr_nodes else np.empty(0, dtype = np.int32)
+    declared = np.asarray(reader.declared, dtype = np.int64)
+    undeclared = np.flatnonzero(np.frombuffer(reader.is_declared, dtype = np.int8) == 0) if nr_nodes else np.empty(0, dtype = np.int64)
+
+    if subgraphs:
+        # nodes grouped per subgraph in declaration order, nodes outside the subgraphs come last
+        declared_clusters = node_cluster[declared]
+        order = np.concatenate([declared[declared_clusters == index] for index in range(len(reader.cluster_names))] +
+                               [declared[declared_clusters == -1], undeclared])
+        cluster_names = reader.cluster_names
+    else:
+        # networkx adds the declared nodes first, then the nodes that only appear in edges
+        order = np.concatenate([declared, undeclared])
+        cluster_names = []
+    order = order.astype(np.int64)
+    position = np.empty(nr_nodes, dtype = np.int64)
+    position[order] = np.arange(nr_nodes)
+
+    src = position[np.frombuffer(reader.edge_src, dtype = np.int32)] if len(reader.edge_src) else np.empty(0, dtype = np.int64)
+    dst = position[np.frombuffer(reader.edge_dst, dtype = np.int32)] if len(reader.edge_dst) else np.empty(0, dtype = np.int64)
+    weights = np.frombuffer(reader.edge_weights, dtype = np.float64) if len(reader.edge_weights) else np.empty(0)
+    clusters = node_cluster[order] if subgraphs else np.full(nr_nodes, -1, dtype = np.int32)
+
+    if subgraphs:
+        intra = (clusters[src] == clusters[dst]) & (clusters[src] != -1)
+        intra_src, intra_dst, intra_weights = collapse_edges(src[intra], dst[intra], weights[intra], nr_nodes, True)
+        inter = np.flatnonzero(~intra)
+        src = np.concatenate([intra_src, src[inter]])
+        dst = np.concatenate([intra_dst, dst[inter]])
+        weights = np.concatenate([intra_weights, weights[inter]])
+        directed = True
+    else:
+        src, dst, weights = collapse_edges(src, dst, weights, nr_nodes, directed)
 
+    return {
+        "node_ids": np.array([reader.node_list[i] for i in order], dtype = str),
+        "edge_src": src.astype(np.int32),
+        "edge_dst": dst.astype(np.int32),
+        "edge_weights": weights.astype(np.float64),
+        "weighted": np.array(bool(reader.first_edge_weighted)),
+        "directed": np.array(directed),
+        "clusters": clusters.astype(np.int32),
+        "cluster_names": np.array(cluster_names, dtype = str),
+    }
 
 
-print("Data loaded")
+def collapse_edges(src, dst, weights, nr_nodes, directed):
+    """
+    merges repeated edges the way a networkx (Di)Graph does: an edge keeps the position of its first appearance
+    and the weight of its last one, edges are listed per start node in node order.
+    undirected edges are turned around so they start at the node that comes first
+    """
+    if not directed:
+        src, dst = np.minimum(src, dst), np.maximum(src, dst)
+    keys = src.astype(np.int64) * nr_nodes + dst
+    order = np.argsort(keys, kind = "stable")
+    sorted_keys = keys[order]
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]]) if len(keys) else np.empty(0, dtype = np.int64)
+    ends = np.r_[starts[1:], len(keys)] - 1
+    first = order[starts]
+    last = order[ends]
+    edge_order = np.lexsort((first, src[first]))
+    return src[first][edge_order], dst[first][edge_order], weights[last][edge_order]
 
-adjacency_dict_list = []
-adjacency_dict = {}
-adjacency_dict_sub1 = {}
-adjacency_dict_sub2 = {}
-adjacency_dict_interlayer = {}
-adjacencies = []
-adjacencies_sub1 = {}
-adjacencies_sub2 = {}
     
-def add_nodes_adjacency_dict(adjacency_dict, G):
+def add_nodes_adjacency_dict(adjacency_dict, node_ids, include_n = False):
     """
     receives a list of nodes and initialize it as adjacency dict keys
     """
-    for n in G.nodes():
+    for n in node_ids:
         if printing_mode:
             print(f"Added node with id {n}")
         if n != "\\n":
@@ -95,92 +1050,112 @@ def add_nodes_adjacency_dict(adjacency_dict, G):
 
 # the first time an edge appears it is marked True, and it will be rendered
 # the second time the same edge appears it is marked False, so it will not be rendered
-def add_edges_to_adjacency_dict(adjacency_dict, edges):  
-    # print("adding edges:",edges) 
-    # print()
-    # print("to adj dict:",adjacency_dict)
-    weightcheck = True
-    weighted = True
-    for e in edges:
-        u, v = e
-        u = u.strip('"')
-        v = v.strip('"')
-        if weightcheck:
-            try:
-                weight = G[u][v]["weight"]
-            except:
-                weighted = False
-            finally:
-                weightcheck = False
-        if weighted:
-            weight = G[u][v]["weight"]
-            adjacency_dict[u].append((v,True, weight))          # True = will be rendered graphically; False = has already been rendered graphically
-            adjacency_dict[v].append((u,False, weight))         # for directed graph, make sure direction is u-->v for True 
-        
-        else:
-            adjacency_dict[u].append((v,True, 1))          # True = will be rendered graphically; False = has already been rendered graphically
-            adjacency_dict[v].append((u,False,1))         # for directed graph, make sure direction is u-->v for True 
+def add_edges_to_adjacency_dict(adjacency_dict, node_ids, edges):
+    """
+    edges is a list of (u, v, weight) triples where u and v are indices into node_ids
+    """
+    for u, v, weight in edges:
+        u = node_ids[u]
+        v = node_ids[v]
+        if u not in adjacency_dict or v not in adjacency_dict:
+            continue                    # an edge of the '\\n' node when it is left out
+        adjacency_dict[u].append((v,True, weight))          # True = will be rendered graphically; False = has already been rendered graphically
+        adjacency_dict[v].append((u,False, weight))         # for directed graph, make sure direction is u-->v for True 
         if printing_mode:
             print(f"Added edge from {u} to {v}")
 
-max_edges = 0
-most_connected_node_id = []
-
 # uncomment if we want to use this again
 # least_connected_node_id = None
 # average_connected_node_id = None
 # random_root_id = np.random.choice(list(adjacency_dict.keys()))
 
+def intern_adjacency(adjacency_dict):
+    """
+    input: an adjacency dict (or AdjacencyView) with node ids as keys
+    output: the list of node ids and the same adjacency dict with every id replaced by its position in that list.
+    the layout engines work on these integers and only map back to the ids for the coordinates they return
+    """
+    if isinstance(adjacency_dict, AdjacencyView):
+        return adjacency_dict.csr.node_ids, adjacency_dict.csr.interned_adjacency()
+    node_ids = list(adjacency_dict.keys())
+    node_index = {id: i for i, id in enumerate(node_ids)}
+    return node_ids, {node_index[id]: [(node_index[edge[0]], edge[1], edge[2]) for edge in edges] for id, edges in adjacency_dict.items()}
+
+def half_edge_arrays(adjacency_dict):
+    """
+    input: an adjacency dict (or AdjacencyView)
+    output: the list of node ids, and for every entry in the adjacency lists the index of the node it belongs to (owner)
+    and the index of its neighbour, so an undirected edge appears once in each direction
+    """
+    if isinstance(adjacency_dict, AdjacencyView):
+        csr = adjacency_dict.csr
+        return csr.node_ids, np.repeat(np.arange(len(csr.node_ids)), csr.degrees()), np.asarray(csr.indices, dtype = np.int64)
+    node_ids, interned = intern_adjacency(adjacency_dict)
+    owner = np.array([i for i, edges in interned.items() for edge in edges], dtype = np.int64)
+    neighbour = np.array([edge[0] for i, edges in interned.items() for edge in edges], dtype = np.int64)
+    return node_ids, owner, neighbour
+
+def half_edge_weights(adjacency_dict):
+    """
+    input: an adjacency dict (or AdjacencyView)
+    output: the weight of every adjacency list entry, in the order of half_edge_arrays
+    """
+    if isinstance(adjacency_dict, AdjacencyView):
+        return np.asarray(adjacency_dict.csr.weights, dtype = float)
+    node_ids, interned = intern_adjacency(adjacency_dict)
+    return np.array([edge[2] for i, edges in interned.items() for edge in edges], dtype = float)
+
+def graph_distance_matrix(adjacency_dict):
+    """
+    input: an adjacency dict (or AdjacencyView)
+    output: the list of node ids and the matrix of shortest path lengths between them, with the edge weights as lengths like
+    floyd_warshall_matrix and inf between nodes that are not connected. dijkstra from every node on the sparse adjacency
+    takes about n² log n time on sparse graphs instead of the n³ of floyd warshall
+    """
+    node_ids, matrix = weighted_adjacency_matrix(adjacency_dict)
+    return node_ids, lazy_import("scipy.sparse.csgraph").shortest_path(matrix, method = "D", directed = False)
+
+def weighted_adjacency_matrix(adjacency_dict):
+    """
+    input: an adjacency dict (or AdjacencyView)
+    output: the list of node ids and a sparse matrix with the weight of the edge between every pair of neighbours, for scipy's shortest paths
+    """
+    node_ids, owner, neighbour = half_edge_arrays(adjacency_dict)
+    weights = half_edge_weights(adjacency_dict)
+    nr_nodes = len(node_ids)
+
+    # of parallel edges only the shortest counts, a sparse matrix would add their weights up
+    keep = owner != neighbour
+    owner, neighbour, weights = owner[keep], neighbour[keep], weights[keep]
+    order = np.lexsort((weights, neighbour, owner))
+    owner, neighbour, weights = owner[order], neighbour[order], weights[order]
+    first = np.ones(len(owner), dtype = bool)
+    first[1:] = (owner[1:] != owner[:-1]) | (neighbour[1:] != neighbour[:-1])
+    return node_ids, lazy_import("scipy.sparse").csr_matrix((weights[first], (owner[first], neighbour[first])), shape = (nr_nodes, nr_nodes))
+
+def layout_half_edges(layout_state, adjacency_dict):
+    """
+    input: a LayoutState and an adjacency dict (or AdjacencyView)
+    output: the owner and neighbour arrays of half_edge_arrays as positions in the arrays of the LayoutState,
+    without the entries of nodes that have no coordinates, and a mask of the nodes of the LayoutState that are in the adjacency dict
+    """
+    node_ids, owner, neighbour = half_edge_arrays(adjacency_dict)
+    to_coords = np.array([layout_state.node_index.get(id, -1) for id in node_ids], dtype = np.int64)
+    in_adjacency = np.zeros(len(layout_state), dtype = bool)
+    in_adjacency[to_coords[to_coords != -1]] = True
+    owner = to_coords[owner]
+    neighbour = to_coords[neighbour]
+    known = (owner != -1) & (neighbour != -1)
+    return owner[known], neighbour[known], in_adjacency
+
 def create_adjacencies(adjacencies, adjacency_dict):
+    if isinstance(adjacency_dict, AdjacencyView):
+        adjacencies.update(zip(adjacency_dict.csr.node_ids, adjacency_dict.csr.degrees().tolist()))
+        return adjacencies
     for id, adj_nodes in list(adjacency_dict.items()): #create dictionary with the size of the number of edges per node
         adjacencies[id] = len(adj_nodes)
     return adjacencies
 
-if (subgraphs_included == False):
-    add_nodes_adjacency_dict(adjacency_dict, G)
-    add_edges_to_adjacency_dict(adjacency_dict, G.edges())
-    adjacencies.append(create_adjacencies(adjacencies_sub1, adjacency_dict))
-    most_connected_node_id.append(max(zip(adjacencies[0].values(), adjacencies[0].keys()))[1]) #retrieve id with max adjacency, add to list
-    adjacency_dict_list.append(adjacency_dict)
-else:
-    print("starting adding nodes to sub1")
-    add_nodes_adjacency_dict(adjacency_dict_sub1, subgraphs_list[0])
-    print("starting adding edges to sub1")
-    add_edges_to_adjacency_dict(adjacency_dict_sub1, subgraphs_list[0].edges())
-    print("starting creating adjacencies to sub1")
-    adjacencies.append(create_adjacencies(adjacencies_sub1, adjacency_dict_sub1))
-    most_connected_node_id.append(max(zip(adjacencies_sub1.values(), adjacencies_sub1.keys()))[1]) #retrieve id with max adjacency, add to list
-    adjacency_dict_list.append(adjacency_dict_sub1)
-
-    print("starting adding nodes to sub2")
-    add_nodes_adjacency_dict(adjacency_dict_sub2, subgraphs_list[1])
-    print("starting adding edges to sub1")
-    add_edges_to_adjacency_dict(adjacency_dict_sub2, subgraphs_list[1].edges())
-
-    print("starting creating adjacencies to sub2")
-    adjacencies.append(create_adjacencies(adjacencies_sub2, adjacency_dict_sub2))
-    most_connected_node_id.append(max(zip(adjacencies_sub2.values(), adjacencies_sub2.keys()))[1]) #retrieve id with max adjacency, add to list
-    adjacency_dict_list.append(adjacency_dict_sub2)
-
-    # add all nodes to dict to be able to add interlayer edges, and add the edges
-    print("starting adding interlayer nodes from sub1")
-    add_nodes_adjacency_dict(adjacency_dict_interlayer, subgraphs_list[0]) 
-    print("starting adding interlayer nodes from sub2")
-    add_nodes_adjacency_dict(adjacency_dict_interlayer, subgraphs_list[1])
-    print("starting adding interlayer edges")
-    add_edges_to_adjacency_dict(adjacency_dict_interlayer, inter_layer_edges)
-    # ignore nodes from dict which have no interlayer edges
-    adjacency_dict_interlayer = {id:val for id, val in adjacency_dict_interlayer.items() if val != []}
-    # add to adjacency dict list
-    adjacency_dict_list.append(adjacency_dict_interlayer)
-
-
-#print("adjacency_dict_list", adjacency_dict_list)
-
-#print(G.edges('0'))
-if printing_mode:
-    print("adjacency_dict:",adjacency_dict)
-
 # if we want to apply average and minimum adjacency again, uncomment
 # avg_adjacency = round(sum(adjacencies.values()) / len(adjacencies))
 # print("average adjacency", avg_adjacency)
@@ -201,29 +1176,43 @@ if printing_mode:
 #     print("minimum is None")
 # print("minimum node", least_connected_node_id)
 
-def create_random_coordinates(width, height, adjacency_dict):
-    coordinates = {}
-    for n in adjacency_dict.keys():
-        x_val = np.random.uniform(-width/2, width/2)
-        y_val = np.random.uniform(-height/2, height/2)
-        coordinates[n] = (x_val, y_val)
-    return coordinates
+def layout_rng(seed = None):
+    """
+    input: a seed, a numpy Generator or None
+    output: the seed and a numpy Generator started from it. a Generator gives a seed drawn from it and None a seed drawn from np.random,
+    so np.random.seed still makes a whole session repeat.
+    the randomized layouts draw all their random numbers from this Generator and keep the seed in the seed of their LayoutState
+    """
+    if isinstance(seed, np.random.Generator):
+        seed = int(seed.integers(2**31))
+    elif seed is None:
+        seed = int(np.random.randint(2**31))
+    return seed, np.random.default_rng(seed)
+
+def create_random_coordinates(width, height, adjacency_dict, seed = None):
+    seed, rng = layout_rng(seed)
+    # drawn as x, y of the first node, x, y of the second node and so on, like one uniform call per value
+    coords = rng.uniform((-width/2, -height/2), (width/2, height/2), size = (len(adjacency_dict), 2))
+    return LayoutState(adjacency_dict.keys(), coords[:, 0], coords[:, 1], seed)
 
 
 #random_coordinates = create_random_coordinates(100, 100)
 
-def create_solar_coordinates(width, height, adjacency_dict, deterministic = False, index = 0):
+def create_solar_coordinates(width, height, adjacency_dict, deterministic = False, index = 0, seed = None):
     coordinates = {}
+    seed, rng = layout_rng(seed)
+    adjacencies = create_adjacencies({}, adjacency_dict)
 
-    max_adjacency = max(adjacencies[index].values()) #retrieve the max adjacency
-    nr_rings = len(set(adjacencies[index].values())) #calculate # of rings based on the # of unique values in adjacency numbers
+    max_adjacency = max(adjacencies.values()) #retrieve the max adjacency
+    nr_rings = len(set(adjacencies.values())) #calculate # of rings based on the # of unique values in adjacency numbers
 
-    rings_dict = assign_to_rings(adjacencies[index])
+    rings_dict = assign_to_rings(adjacencies)
 
     if deterministic == False:
-        coordinates = convert_to_solar_coordinates(rings_dict, nr_rings, max_adjacency, height, width)
+        coordinates = convert_to_solar_coordinates(rings_dict, nr_rings, max_adjacency, height, width, rng)
     else:
         coordinates = convert_to_deterministic_solar_coordinates(rings_dict, nr_rings, max_adjacency, height, width)
+        seed = None
 
     if printing_mode:
         print("rings_dict - Which nodes belong to which ring")
@@ -232,6 +1221,8 @@ def create_solar_coordinates(width, height, adjacency_dict, deterministic = Fals
     #print("the coordinates of each node")
     #print(coordinates)
 
+    coordinates = LayoutState.from_coordinates(coordinates)
+    coordinates.seed = seed
     return coordinates
 
 def assign_to_rings(adjacencies):
@@ -263,8 +1254,10 @@ def polar_to_cartesian(angle, radius, center_x, center_y):
     return (x_val, y_val)   
 
 
-def convert_to_solar_coordinates(rings_dict, nr_rings, max_adjacency, height, width):
+def convert_to_solar_coordinates(rings_dict, nr_rings, max_adjacency, height, width, rng = None):
     coordinates = {}
+    if rng is None:
+        rng = layout_rng()[1]
 
     # if the ring with the highest adjacency has just one node, put this one in the middle of the screen.
     if(len(rings_dict[max_adjacency]) == 1):
@@ -286,7 +1279,7 @@ def convert_to_solar_coordinates(rings_dict, nr_rings, max_adjacency, height, wi
 
     #generate random angle for each node --> convert polar coordinates (radius, angle) to cartesian coordinates
         for vertex_id in rings_dict[ring_id]:
-            angle = np.random.uniform(0, 2*math.pi) #generate random angle
+            angle = rng.uniform(0, 2*math.pi) #generate random angle
             coordinates[vertex_id] = polar_to_cartesian(angle, radius,0,0)
             if printing_mode:
                 print("assigned to vertex",vertex_id,"a radius of",radius,"and angle of",angle)
@@ -331,10 +1324,8 @@ def convert_to_deterministic_solar_coordinates(rings_dict, nr_rings, max_adjacen
 
     return coordinates
 
-coordinates = {}
-
 def create_radial_coordinates(width, height, node_list, node_radius):
-    #coordinates = {}
+    coordinates = {}
     annulus_wedge_angles = {} #store each annulus_wedge_angle in here by node_id
     max_depth = get_max_depth(node_list)
     radius_tuple = calc_radius(width, height, max_depth)
@@ -356,99 +1347,96 @@ def create_radial_coordinates(width, height, node_list, node_radius):
     
     #Initialize the root node
     coordinates[root_node] = (0,0)
+    node_ids, children, subtree_sizes = radial_tree_index(node_list)
 
     # conquer case:
-    # first layer after the root
-    direct_root_children = calc_direct_children(node_list, root_node)
-    nr_root_children = len(direct_root_children)
+    # first layer after the root, spread evenly around it
+    root_children = children[0]
     if printing_mode:
-        print("root children", direct_root_children)
-    angle_difference = 2 * math.pi / nr_root_children
+        print("root children", [node_ids[child] for child in root_children])
+    angle_difference = 2 * math.pi / len(root_children)
     child_angle = 0
-    for child in direct_root_children:
-        child_id = child[1]
-        if printing_mode:
-            print("angle of child", child_id, "is", child_angle)
-
-        #determine coordinates child
-        parent_x = coordinates[root_node][0]
-        parent_y = coordinates[root_node][1]
-        coordinates[child_id] = polar_to_cartesian(child_angle, start_radius, parent_x, parent_y)
-        children_of_child = calc_direct_children(node_list, child_id)
-        if printing_mode:
-            print(child_id, "has children", children_of_child)
-        parent_angle = child_angle
+    # a stack of (node, parent x, parent y, distance to the parent, angle, radius of its layer) instead of recursion, so deep trees
+    # do not reach the recursion limit. the children go on the stack in reverse, so the nodes are placed depth first in the order of node_list
+    stack = []
+    for child in root_children:
+        stack.append((child, 0, 0, start_radius, child_angle, start_radius))
         child_angle += angle_difference
-        #print("children", children_of_child)
-        #recurse on children (divide case)
-        calc_radial_coordinates_children(node_list, child_id, start_radius, distance_between_layers, parent_angle)
+    stack.reverse()
+
+    # the deeper layers get an annulus wedge around the angle of their parent
+    while stack:
+        node, parent_x, parent_y, distance, angle, radius = stack.pop()
+        node_x, node_y = coordinates[node_ids[node]] = polar_to_cartesian(angle, distance, parent_x, parent_y)
+        if not children[node]:
+            continue
+
+        wedge_angle = calc_ann_wedge(subtree_sizes, node, children[node][0], radius, radius + distance_between_layers)
+        angle_increase = wedge_angle / (len(children[node]) + 1)
+        child_angle = angle - (wedge_angle/2) + angle_increase
+        child_layers = []
+        for child in children[node]:
+            child_layers.append((child, node_x, node_y, distance_between_layers, child_angle, radius + distance_between_layers))
+            child_angle += angle_increase
+        stack.extend(reversed(child_layers))
 
     return coordinates
 
-def calc_ann_wedge(node_list, parent_id, child_id, radius1, radius2):
+def radial_tree_index(node_list):
+    """
+    input: a node list of (parent, child) pairs that starts with (root, root), like create_radial_coordinates takes
+    output: the node ids in the order of node_list (the root at index 0), the indices of the children of every node in the order of node_list
+    and the number of nodes in the subtree of every node, itself included. this takes one pass over node_list and one over the tree
+    from the leaves up, so the radial layout takes linear time
+    """
+    index = {}
+    node_ids = []
+    children = []
+    for parent, child in node_list:
+        for node_id in (parent, child):
+            if node_id not in index:
+                index[node_id] = len(node_ids)
+                node_ids.append(node_id)
+                children.append([])
+        if parent != child:
+            children[index[parent]].append(index[child])
+
+    # parents come before their children in order, so the subtree sizes add up from the back
+    order = [0]
+    for node in order:
+        order.extend(children[node])
+    subtree_sizes = [1] * len(node_ids)
+    for node in reversed(order):
+        for child in children[node]:
+            subtree_sizes[node] += subtree_sizes[child]
+    return node_ids, children, subtree_sizes
+
+def split_forest(node_list):
+    """
+    input: a node list of (parent, child) pairs like create_radial_coordinates takes, in which every tree starts with (root, root)
+    output: list with the node list of every tree
+    """
+    trees = []
+    for parent, child in node_list:
+        if parent == child:
+            trees.append([])
+        trees[-1].append((parent, child))
+    return trees
+
+def calc_ann_wedge(subtree_sizes, parent, child, radius1, radius2):
     #calculate annulus wedge for each vertex based on the formulas from the slides
-    length_child = len(calc_all_children(node_list, child_id)) + 1
-    length_parent = len(calc_all_children(node_list, parent_id)) + 1
+    #subtree_sizes holds the number of nodes in the subtree of every node, see radial_tree_index
+    length_child = subtree_sizes[child]
+    length_parent = subtree_sizes[parent]
     radius_angle = 2 * math.acos(radius1 / radius2)
     length_angle = length_child / (length_parent-1)
     wedge_angle = min(radius_angle, length_angle)
 
     if printing_mode:
-        print("for", child_id, "radiusangle is", radius_angle,"and length angle", length_angle)
+        print("for", child, "radiusangle is", radius_angle,"and length angle", length_angle)
 
     return wedge_angle
 
-def calc_all_children(node_list, parent_id):
-    #calculate all children of a node given its id (parent_id) en the list of all nodes
-    all_children = [] #including grandchildren, thus the whole subtree rooted at the parent_id
-
-    for tuple in node_list:
-        if tuple[0] in all_children:
-            #check if a parent is in the all_children list, if so append its child to the list
-            all_children.append(tuple[1])
-            #print("add child", tuple[1], "with parent", tuple[0], "to all_children list")
-        elif tuple[0] == parent_id and tuple[0] != tuple[1]:
-            #check if the node id is not the same as the parent_id and if it is a child of the parent id
-            all_children.append(tuple[1])
-            #print("add child", tuple[1], "with parent", tuple[0], "to all_children list")
-        #else do nothing 
-    return all_children
-
-def calc_direct_children(node_list, parent_id):
-    direct_children = []
-    for tuple in node_list:
-        if tuple[0] == parent_id and tuple[0] != tuple[1]:
-            #check if the node id is not the same as the parent_id and if it is a direct child of the parent id
-            direct_children.append(tuple) #was tuple[1]
-            if printing_mode:
-                print("add child", tuple[1], "with parent", tuple[0], "to direct_children list")
-
-    return direct_children
-
-def calc_radial_coordinates_children(node_list, parent_node, start_radius, radius_distance, parent_angle):
-    #recursive function for calculating radial coordinates
-    direct_children = calc_direct_children(node_list, parent_node)
-    #print("direct children list in recursion", direct_children)
-    if not direct_children:
-        #print("child list of parent", parent_node, "is empty")
-        return
-    
-    wedge_angle = calc_ann_wedge(node_list, parent_node, direct_children[0][1], start_radius, start_radius+radius_distance)
-    angle_increase = wedge_angle/ (len(direct_children)+1)
-    child_angle = parent_angle - (wedge_angle/2) + angle_increase
-   
-    for child in direct_children:
-        child_id = child[1]
-        #print("child", child_id, "from parent", child[0])
-        #print("angle of child", child_id, "is", child_angle)
-        parent_x = coordinates[parent_node][0]
-        parent_y = coordinates[parent_node][1]
-        coordinates[child_id] = polar_to_cartesian(child_angle, radius_distance, parent_x, parent_y)
-        #print("coordinates of child", coordinates[child_id])
-        child_radius = start_radius + radius_distance #calculate the radius of the new layer for the new child
-        calc_radial_coordinates_children(node_list, child_id, child_radius, radius_distance, child_angle)
-        child_angle += angle_increase
-
 node_list_dfs = [('11','11'), ('11','2'), ('2','1'), ('2','3'), ('3','4'), ('2','5'), ('2','6'), ('2','7'), ('2','8'), ('2','9'),
                  ('2','10'), ('11','12'), ('11', '13'), ('13', '24'), ('24', '17'), ('17', '18'), ('18', '27'), ('27', '25'), ('25', '26'),
                  ('26', '28'), ('28', '29'), ('29', '45'), ('29', '46'), ('28', '30'), ('30', '35'), ('35', '36'), ('36', '37')]
@@ -476,11 +1464,43 @@ def calc_radius(width, height, max_depth):
         radius_distance = height / (max_depth + 1)
     return (radius, radius_distance)
 
-def create_force_layout_coordinates(width, height, initial_coords, adjacency_dict, C = 1, max_iterations = 200, index = 0):
+def create_force_layout_coordinates(width, height, initial_coords, adjacency_dict, C = 1, max_iterations = 200, index = 0, engine = None, repulsion = None, theta = None, max_start_temp = 256,
+                                    pinned = None, seed = None):
+    """
+    engine is "numpy" or "python", by default the force_engine setting
+    repulsion is "exact", "barnes_hut" with opening angle theta or "grid" with a cutoff of grid_cutoff ideal edge lengths, by default the force_repulsion setting
+    the start temperatures are drawn between 3 and max_start_temp, a lower maximum keeps more of a good initial layout
+    pinned holds the ids of nodes that keep their place, they still repel and attract the others but get no forces themselves
+    seed gives the start temperatures, see layout_rng
+    """
+    if engine is None:
+        engine = force_engine
+    if repulsion is None:
+        repulsion = force_repulsion
+    if theta is None:
+        theta = barnes_hut_theta
+    if engine == "numpy":
+        return create_force_layout_coordinates_numpy(width, height, initial_coords, adjacency_dict, C = C, max_iterations = max_iterations, repulsion = repulsion, theta = theta, cutoff = grid_cutoff,
+                                                     max_start_temp = max_start_temp, pinned = pinned, seed = seed)
+    elif engine != "python":
+        raise ValueError("Unsupported force engine " + str(engine))
+    elif repulsion != "exact":
+        raise ValueError("The python force engine only supports exact repulsion")
+
     delta = 0.075 # given number within the range (0,1]`
     iteration_count = 0
+    node_ids, adjacency_dict = intern_adjacency(adjacency_dict)
+    node_ids = list(node_ids)
+    node_index = {id: i for i, id in enumerate(node_ids)}
+    for id in initial_coords.keys():
+        if id not in node_index:
+            node_index[id] = len(node_ids)
+            node_ids.append(id)
+    initial_coords = {node_index[id]: coords for id, coords in initial_coords.items()}
+    pinned = {node_index[id] for id in (pinned or ()) if id in node_index}
     coords_dict = initial_coords.copy()
-    temp_dict = {key: np.random.uniform(3, 256) for key in list(initial_coords.keys()) } # dictionary with all temperature values
+    rng = layout_rng(seed)[1]
+    temp_dict = {key: rng.uniform(3, max_start_temp) for key in list(initial_coords.keys()) } # dictionary with all temperature values
     skew_gauge_dict = {key: 0 for key in list(initial_coords.keys())} # dictionary with all skew gauge values
     prev_force_dict = {key: 0 for key in list(initial_coords.keys())} # init dictionary with prev force values
     area = width * height
@@ -488,18 +1508,21 @@ def create_force_layout_coordinates(width, height, initial_coords, adjacency_dic
     t_global = 100 #random number for t_global
     
     nr_vertices = len(initial_coords.keys())
+    adjacencies = create_adjacencies({}, adjacency_dict)
 
-    while t_global > t_min and iteration_count < max_iterations: #change max iterations maybe
-        coords_dict, temp_dict = force_iteration(width, height, coords_dict, prev_force_dict, temp_dict, skew_gauge_dict, delta, area, nr_vertices, C, adjacency_dict, local_adjacencies = adjacencies[index])
-        t_global = sum(temp_dict.values()) / len(temp_dict) #update global temperature
+    free = [key for key in temp_dict if key not in pinned]
+    while free and t_global > t_min and iteration_count < max_iterations: #change max iterations maybe
+        coords_dict, temp_dict = force_iteration(width, height, coords_dict, prev_force_dict, temp_dict, skew_gauge_dict, delta, area, nr_vertices, C, adjacency_dict, local_adjacencies = adjacencies,
+                                                 pinned = pinned)
+        t_global = sum(temp_dict[key] for key in free) / len(free) #update global temperature of the nodes that move
         iteration_count += 1
 
-    return coords_dict
+    return {node_ids[i]: coords for i, coords in coords_dict.items()}
 
 
 def force_iteration(width, height, old_coordinates_dict, prev_force_dict, temp_dict, skew_gauge_dict,
-                    delta_value, area, nr_vertices, C, local_adjacency_dict, local_adjacencies, use_barycenter = True, apply_boundaries = True, single_node_iteration = False):
-    new_coordinates_dict = copy.deepcopy(old_coordinates_dict)
+                    delta_value, area, nr_vertices, C, local_adjacency_dict, local_adjacencies, use_barycenter = True, apply_boundaries = True, single_node_iteration = False, pinned = ()):
+    new_coordinates_dict = dict(old_coordinates_dict)             # the coordinates are tuples, so a shallow copy is enough
 
     barycenter = [0,0]
 
@@ -556,6 +1579,8 @@ def force_iteration(width, height, old_coordinates_dict, prev_force_dict, temp_d
    #     print("local adj dict keys is",local_adjacency_dict.keys())
       #  print("old coords dict keys is", old_coordinates_dict.keys())
         for id in (local_adjacency_dict.keys()):
+            if id in pinned:
+                continue
             try:
                 old_coords_tuple = old_coordinates_dict[id]             # (x,y) tuple
             except:
@@ -616,6 +1641,722 @@ def force_iteration(width, height, old_coordinates_dict, prev_force_dict, temp_d
 
     return new_coordinates_dict, temp_dict
 
+def create_force_layout_coordinates_numpy(width, height, initial_coords, adjacency_dict, C = 1, max_iterations = 200, repulsion = "exact", theta = 0.5, cutoff = 2, max_start_temp = 256, pinned = None, seed = None):
+    """
+    the force layout of create_force_layout_coordinates with the forces of all nodes computed at once on arrays, see force_iteration_numpy.
+    nodes of initial_coords that are not in the adjacency dict keep their place, but count for the barycenter like in the python engine.
+    the result is a LayoutState with the seed of the start temperatures, when initial_coords already is one it is updated in place and returned.
+    with an approximate repulsion, its error against the exact repulsion on the final layout is printed.
+    the grid repulsion ignores nodes further away than cutoff times calc_ideal_length. the pinned nodes keep their place, see ForceSimulation.from_coordinates
+    """
+    simulation = ForceSimulation.from_coordinates(width, height, initial_coords, adjacency_dict, pinned = pinned, C = C, max_iterations = max_iterations, repulsion = repulsion, theta = theta, cutoff = cutoff,
+                                                  max_start_temp = max_start_temp, seed = seed)
+    simulation.run()
+    simulation.layout_state.seed = simulation.seed
+    return simulation.layout_state
+
+def run_force_layout_numpy(width, height, x, y, owner, neighbour, movable, C = 1, max_iterations = 200, repulsion = "exact", theta = 0.5, cutoff = 2, max_start_temp = 256, clear_trace = True, seed = None):
+    """
+    input: coordinate arrays (updated in place), the adjacency as owner and neighbour index arrays (see half_edge_arrays),
+    the nodes that are moved and the settings of ForceSimulation
+    output: the number of iterations
+    """
+    return ForceSimulation(width, height, x, y, owner, neighbour, movable, C = C, max_iterations = max_iterations, repulsion = repulsion, theta = theta, cutoff = cutoff,
+                           max_start_temp = max_start_temp, clear_trace = clear_trace, seed = seed).run()
+
+class ForceSimulation:
+    """
+    a numpy force layout that is advanced one iteration at a time with step, so it can be spread over the frames of the window.
+    x and y are updated in place, the adjacency is given as owner and neighbour index arrays (see half_edge_arrays) and only
+    the movable nodes are moved. the start temperatures are drawn between 3 and max_start_temp from seed (see layout_rng), a lower maximum only refines the layout.
+    every iteration is recorded in force_trace (emptied first when clear_trace is True), and the layout is done after max_iterations,
+    when the mean temperature is down to t_min or when the displacement has reached a plateau (see displacement_plateau).
+    sources and external_force replace the repulsion between the movable nodes, see force_iteration_numpy
+    """
+    delta = 0.075
+    t_min = 3
+
+    def __init__(self, width, height, x, y, owner, neighbour, movable, C = 1, max_iterations = 200, repulsion = "exact", theta = 0.5, cutoff = 2, max_start_temp = 256, clear_trace = True,
+                 sources = None, external_force = None, seed = None):
+        self.width = width
+        self.height = height
+        self.x = x
+        self.y = y
+        self.owner = owner
+        self.neighbour = neighbour
+        self.movable = movable
+        self.max_iterations = max_iterations
+        self.repulsion = repulsion
+        self.theta = theta
+        self.sources = sources
+        self.external_force = external_force
+        self.layout_state = None
+        self.t_global = 100
+        self.iteration_count = 0
+        self.converged = not movable.any()
+        self.nr_vertices = len(x)
+        self.mass = 1 + np.bincount(owner, minlength = self.nr_vertices) / 2
+        self.radius = cutoff * calc_ideal_length(width * height, self.nr_vertices, C)
+
+        self.seed, rng = layout_rng(seed)
+        self.state = {
+            "temp": rng.uniform(3, max_start_temp, size = self.nr_vertices),
+            "skew": np.zeros(self.nr_vertices),
+            "prev_fx": np.zeros(self.nr_vertices),
+            "prev_fy": np.zeros(self.nr_vertices),
+            "has_prev": np.zeros(self.nr_vertices, dtype = bool),            # the first iteration has no previous force to compare with
+        }
+
+        if clear_trace:
+            force_trace.clear()
+        self.first_record = len(force_trace)
+        self.history = deque(maxlen = force_plateau_window + 1)            # positions of the last iterations, to measure how far the nodes got
+        self.history.append((x[movable], y[movable]))
+
+    @classmethod
+    def from_coordinates(cls, width, height, initial_coords, adjacency_dict, pinned = None, **settings):
+        """
+        input: width and height of the layout area, a coordinates dict or LayoutState, an adjacency dict, the ids of the pinned nodes and the settings of ForceSimulation
+        output: a ForceSimulation on the LayoutState of the coordinates (see create_force_layout_coordinates_numpy), kept as layout_state.
+        pinned nodes are not movable and their adjacency entries are left out, they only repel the other nodes and pull their neighbours
+        """
+        layout_state = LayoutState.from_coordinates(initial_coords)
+        owner, neighbour, in_adjacency = layout_half_edges(layout_state, adjacency_dict)
+        movable = in_adjacency
+        pinned = [id for id in (pinned or ()) if id in layout_state]
+        if pinned:
+            movable = in_adjacency.copy()
+            movable[layout_state.indices(pinned)] = False
+            free_edges = movable[owner]
+            owner, neighbour = owner[free_edges], neighbour[free_edges]
+            settings["sources"] = np.flatnonzero(in_adjacency)
+        simulation = cls(width, height, layout_state.x, layout_state.y, owner, neighbour, movable, **settings)
+        simulation.layout_state = layout_state
+        return simulation
+
+    @property
+    def done(self):
+        return self.converged or self.t_global <= self.t_min or self.iteration_count >= self.max_iterations
+
+    def step(self):
+        """
+        performs one iteration and records it in force_trace
+        output: True when the simulation is not done yet
+        """
+        x = self.x
+        y = self.y
+        movable = self.movable
+        old_x = x[movable]
+        old_y = y[movable]
+        energy = force_iteration_numpy(self.width, self.height, x, y, self.state, self.mass, self.owner, self.neighbour, movable, self.delta, self.nr_vertices,
+                                       repulsion = self.repulsion, theta = self.theta, radius = self.radius, sources = self.sources, external_force = self.external_force)
+        self.t_global = self.state["temp"][movable].mean()
+        self.iteration_count += 1
+
+        displacement = np.hypot(x[movable] - old_x, y[movable] - old_y)
+        self.history.append((x[movable], y[movable]))
+        net_displacement = np.hypot(x[movable] - self.history[0][0], y[movable] - self.history[0][1]) / (len(self.history) - 1)
+        force_trace.append({
+            "iteration": self.iteration_count,
+            "temperature": float(self.t_global),
+            "mean_displacement": float(displacement.mean()) if len(displacement) else 0.0,
+            "max_displacement": float(displacement.max()) if len(displacement) else 0.0,
+            "net_displacement": float(net_displacement.mean()) if len(displacement) else 0.0,
+            "energy": energy,
+        })
+        if displacement_plateau(list(force_trace)[self.first_record:], force_plateau_window, force_plateau_tolerance, force_plateau_jitter):
+            self.converged = True
+            if printing_mode:
+                print("force layout converged after", self.iteration_count, "iterations")
+        return not self.done
+
+    def run(self):
+        """
+        performs iterations until the simulation is done
+        output: the number of iterations
+        """
+        while not self.done:
+            self.step()
+        self.finish()
+        return self.iteration_count
+
+    def finish(self):
+        # with an approximate repulsion, its error against the exact repulsion is printed
+        if self.repulsion != "exact" and self.sources is None:
+            print(self.repulsion, "repulsion error after", self.iteration_count, "iterations:",
+                  "{:.2g}%".format(100 * repulsion_error(self.x, self.y, np.flatnonzero(self.movable), self.repulsion, theta = self.theta, radius = self.radius)), "of the exact repulsion")
+
+def relax_force_layout_locally(width, height, coordinates, adjacency_dict, moved_ids, hops = None, max_nodes = None, C = 1, max_iterations = 50, max_start_temp = 64, pinned = None, seed = None):
+    """
+    input: width and height of the layout area, the coordinates (a dict or LayoutState, updated in place when it is a LayoutState),
+    the adjacency dict, the ids of the nodes that were moved by hand, the number of hops and the maximum number of relaxed nodes
+    (by default local_relaxation_hops and local_relaxation_max_nodes) and the ids of the pinned nodes
+    output: the LayoutState and the ids of the nodes that were relaxed.
+    only the nodes within hops edges of the moved nodes get a force layout, the moved nodes themselves, the pinned nodes and all other nodes keep their place.
+    the first hop is always taken, a further hop only when the relaxed nodes stay within max_nodes.
+    the relaxed nodes are repelled exactly by the nodes within grid_cutoff ideal edge lengths of the neighbourhood, the repulsion of the
+    nodes further away is computed once at the start and kept fixed, so an iteration costs in the size of the neighbourhood instead of the graph
+    """
+    if hops is None:
+        hops = local_relaxation_hops
+    if max_nodes is None:
+        max_nodes = local_relaxation_max_nodes
+    layout_state = LayoutState.from_coordinates(coordinates)
+    x = layout_state.x
+    y = layout_state.y
+    owner, neighbour, in_adjacency = layout_half_edges(layout_state, adjacency_dict)
+    moved = np.zeros(len(layout_state), dtype = bool)
+    moved[layout_state.indices([id for id in moved_ids if id in layout_state])] = True
+    kept = moved.copy()
+    kept[layout_state.indices([id for id in (pinned or ()) if id in layout_state])] = True
+
+    reached = moved.copy()
+    frontier = moved
+    for hop in range(hops):
+        next_frontier = np.zeros(len(layout_state), dtype = bool)
+        next_frontier[neighbour[frontier[owner]]] = True
+        frontier = next_frontier & ~reached
+        if hop > 0 and np.count_nonzero((reached | frontier) & in_adjacency & ~kept) > max_nodes:
+            break
+        reached |= frontier
+    movable = reached & in_adjacency & ~kept
+    nodes = np.flatnonzero(movable)
+    if len(nodes) == 0:
+        return layout_state, []
+
+    # the nodes around the neighbourhood repel it exactly, the rest only through their repulsion at the start
+    local = reached & in_adjacency
+    radius = grid_cutoff * calc_ideal_length(width * height, len(layout_state), C)
+    near = in_adjacency & (x >= x[local].min() - radius) & (x <= x[local].max() + radius) & (y >= y[local].min() - radius) & (y <= y[local].max() + radius)
+    far_fx, far_fy = exact_repulsion(x, y, np.flatnonzero(in_adjacency & ~near), rows = nodes)
+    external_force = (np.zeros(len(layout_state)), np.zeros(len(layout_state)))
+    external_force[0][nodes] = far_fx
+    external_force[1][nodes] = far_fy
+
+    local_edges = movable[owner]            # only the forces on the relaxed nodes are needed
+    simulation = ForceSimulation(width, height, x, y, owner[local_edges], neighbour[local_edges], movable, C = C, max_iterations = max_iterations,
+                                 max_start_temp = max_start_temp, sources = np.flatnonzero(near), external_force = external_force, seed = seed)
+    simulation.layout_state = layout_state
+    simulation.run()
+    if printing_mode:
+        print("relaxed", len(nodes), "nodes around", len(moved_ids), "moved nodes in", simulation.iteration_count, "iterations")
+    return layout_state, [layout_state.node_ids[i] for i in nodes]
+
+def create_multilevel_force_layout_coordinates(width, height, adjacency_dict, C = 1, min_nodes = 30, coarsest_iterations = 200, level_iterations = 30, repulsion = None, theta = None, seed = None):
+    """
+    input: width and height of the layout area and an adjacency dict (or AdjacencyView)
+    output: LayoutState of a force layout computed on a hierarchy of coarser graphs.
+    the graph is coarsened with coarsen_graph until it has at most min_nodes nodes or stops shrinking. the coarsest graph gets
+    a random layout and coarsest_iterations force iterations, then every finer level starts from the position of its coarse node
+    and is refined with level_iterations iterations at a lower temperature. all random numbers come from seed, see layout_rng
+    """
+    seed, rng = layout_rng(seed)
+    if repulsion is None:
+        repulsion = force_repulsion
+    if theta is None:
+        theta = barnes_hut_theta
+    spread = 16                     # finer nodes start this far around their coarse node, nodes on the same spot would not push apart
+
+    node_ids, owner, neighbour = half_edge_arrays(adjacency_dict)
+    levels = [(len(node_ids), owner, neighbour)]
+    mappings = []
+    while levels[-1][0] > min_nodes:
+        nr_nodes, owner, neighbour = levels[-1]
+        mapping, nr_coarse_nodes, coarse_owner, coarse_neighbour = coarsen_graph(nr_nodes, owner, neighbour, rng)
+        if nr_coarse_nodes > 0.9 * nr_nodes:
+            break
+        mappings.append(mapping)
+        levels.append((nr_coarse_nodes, coarse_owner, coarse_neighbour))
+    if printing_mode:
+        print("multilevel force layout with level sizes", [level[0] for level in levels])
+
+    nr_nodes, owner, neighbour = levels[-1]
+    x = rng.uniform(-width/2, width/2, size = nr_nodes)
+    y = rng.uniform(-height/2, height/2, size = nr_nodes)
+    run_force_layout_numpy(width, height, x, y, owner, neighbour, np.ones(nr_nodes, dtype = bool), C = C, max_iterations = coarsest_iterations, repulsion = repulsion, theta = theta, cutoff = grid_cutoff,
+                           seed = rng)
+
+    for level in range(len(mappings) - 1, -1, -1):
+        nr_nodes, owner, neighbour = levels[level]
+        x = np.clip(x[mappings[level]] + rng.uniform(-spread, spread, size = nr_nodes), -width/2, width/2)
+        y = np.clip(y[mappings[level]] + rng.uniform(-spread, spread, size = nr_nodes), -height/2, height/2)
+        run_force_layout_numpy(width, height, x, y, owner, neighbour, np.ones(nr_nodes, dtype = bool), C = C, max_iterations = level_iterations, repulsion = repulsion, theta = theta, cutoff = grid_cutoff, max_start_temp = 64, clear_trace = False,
+                               seed = rng)
+
+    return LayoutState(node_ids, x, y, seed)
+
+def create_best_force_layout_coordinates(width, height, adjacency_dict, nr_seeds = None, measure = None, processes = None, seed = None, C = 1, max_iterations = 200):
+    """
+    input: width and height of the layout area, an adjacency dict (or AdjacencyView), the number of random starts,
+    the quality measure ("crossings" or "stress", see layout_score), the number of worker processes (default: one per core, and none below best_of_parallel_nodes nodes)
+    and the first seed (see layout_rng), the layouts start from this seed and the ones after it
+    output: LayoutState of the best of nr_seeds random-initialized force layouts. its seed is the first seed, which replays the whole best-of run,
+    not the seed of the winning layout (that one is printed in printing mode).
+    the layouts run in parallel in a process pool, only the adjacency arrays and the coordinates travel between the processes
+    """
+    if nr_seeds is None:
+        nr_seeds = best_of_seeds
+    if measure is None:
+        measure = best_of_measure
+    seed = layout_rng(seed)[0]
+
+    node_ids, owner, neighbour = half_edge_arrays(adjacency_dict)
+    arguments = (width, height, len(node_ids), owner, neighbour, measure, C, max_iterations, force_repulsion, barnes_hut_theta, grid_cutoff)
+    seeds = [seed + k for k in range(nr_seeds)]
+    if processes == 1 or len(node_ids) < best_of_parallel_nodes:
+        # small graphs, like most components of a disconnected graph, are laid out faster without starting a pool
+        results = [force_layout_of_seed(*arguments, seed = layout_seed) for layout_seed in seeds]
+    else:
+        with ProcessPoolExecutor(max_workers = processes) as executor:
+            futures = [executor.submit(force_layout_of_seed, *arguments, seed = layout_seed) for layout_seed in seeds]
+            results = [future.result() for future in futures]
+
+    best = min(range(nr_seeds), key = lambda k: results[k][0])
+    if printing_mode:
+        print("best of", nr_seeds, "force layouts by", measure, "is seed", seeds[best], "with", results[best][0], "- all:", [round(result[0], 3) for result in results])
+    return LayoutState(node_ids, results[best][1], results[best][2], seed)
+
+def force_layout_of_seed(width, height, nr_nodes, owner, neighbour, measure, C, max_iterations, repulsion, theta, cutoff, seed):
+    """
+    worker of create_best_force_layout_coordinates: a random-initialized force layout (like create_random_coordinates and
+    create_force_layout_coordinates) from the given seed
+    output: the score of the layout and its x and y arrays
+    """
+    rng = np.random.default_rng(seed)
+    coords = rng.uniform((-width/2, -height/2), (width/2, height/2), size = (nr_nodes, 2))
+    x = coords[:, 0].copy()
+    y = coords[:, 1].copy()
+    run_force_layout_numpy(width, height, x, y, owner, neighbour, np.ones(nr_nodes, dtype = bool), C = C, max_iterations = max_iterations, repulsion = repulsion, theta = theta, cutoff = cutoff, seed = rng)
+    return layout_score(x, y, owner, neighbour, measure), x, y
+
+def layout_score(x, y, owner, neighbour, measure = "crossings"):
+    """
+    input: coordinate arrays, the adjacency as owner and neighbour index arrays and the measure
+    output: a quality score of the layout, lower is better. "crossings" is the number of edge crossings (see edge_crossings),
+    "stress" the stress against the graph distances from a sample of nodes (see sampled_stress)
+    """
+    if measure == "crossings":
+        edges = np.unique(np.minimum(owner, neighbour)[owner != neighbour] * len(x) + np.maximum(owner, neighbour)[owner != neighbour])
+        return edge_crossings(x, y, edges // len(x), edges % len(x))
+    elif measure == "stress":
+        return sampled_stress(x, y, owner, neighbour)
+    raise ValueError("Unsupported layout measure " + str(measure))
+
+def edge_crossings(x, y, src, dst, max_pairs = 1 << 22, chunk_elements = 1 << 20):
+    """
+    input: coordinate arrays and the edges as source and destination index arrays
+    output: the number of pairs of edges without a common node that cross. with more than max_pairs pairs of edges,
+    it is estimated from max_pairs random pairs (the same pairs for every layout of the graph, so layouts can be compared)
+    """
+    nr_edges = len(src)
+    nr_pairs = nr_edges * (nr_edges - 1) // 2
+    if nr_pairs == 0:
+        return 0
+    if nr_pairs <= max_pairs:
+        first, second = np.triu_indices(nr_edges, 1)
+    else:
+        rng = np.random.default_rng(0)
+        first = rng.integers(0, nr_edges, max_pairs)
+        second = rng.integers(0, nr_edges, max_pairs)
+
+    def side(ax, ay, bx, by, px, py):
+        return np.sign((bx - ax) * (py - ay) - (by - ay) * (px - ax))
+
+    crossings = 0
+    for start in range(0, len(first), chunk_elements):
+        a = first[start:start + chunk_elements]
+        b = second[start:start + chunk_elements]
+        separate = (src[a] != src[b]) & (src[a] != dst[b]) & (dst[a] != src[b]) & (dst[a] != dst[b])
+        a = a[separate]
+        b = b[separate]
+        crossing = ((side(x[src[a]], y[src[a]], x[dst[a]], y[dst[a]], x[src[b]], y[src[b]]) * side(x[src[a]], y[src[a]], x[dst[a]], y[dst[a]], x[dst[b]], y[dst[b]]) < 0)
+                    & (side(x[src[b]], y[src[b]], x[dst[b]], y[dst[b]], x[src[a]], y[src[a]]) * side(x[src[b]], y[src[b]], x[dst[b]], y[dst[b]], x[dst[a]], y[dst[a]]) < 0))
+        crossings += int(crossing.sum())
+    if nr_pairs <= max_pairs:
+        return crossings
+    return crossings * nr_pairs / max_pairs
+
+def sampled_stress(x, y, owner, neighbour, nr_pivots = 50):
+    """
+    input: coordinate arrays and the adjacency as owner and neighbour index arrays
+    output: the stress of the layout against the number of hops from nr_pivots sampled nodes (the same for every layout of the graph)
+    to all nodes they can reach, after scaling the layout to fit these distances best, divided by the number of pairs
+    """
+    nr_nodes = len(x)
+    csgraph = lazy_import("scipy.sparse.csgraph")
+    sparse = lazy_import("scipy.sparse")
+    matrix = sparse.csr_matrix((np.ones(len(owner)), (owner, neighbour)), shape = (nr_nodes, nr_nodes))
+    pivots = np.sort(np.random.default_rng(0).choice(nr_nodes, min(nr_pivots, nr_nodes), replace = False))
+    graph_dist = csgraph.shortest_path(matrix, directed = False, unweighted = True, indices = pivots)
+    layout_dist = np.hypot(x[pivots, None] - x[None, :], y[pivots, None] - y[None, :])
+    reachable = np.isfinite(graph_dist) & (graph_dist > 0)
+    graph_dist = graph_dist[reachable]
+    layout_dist = layout_dist[reachable]
+    if len(graph_dist) == 0:
+        return 0.0
+    weights = 1 / graph_dist ** 2
+    scale = np.sum(weights * layout_dist * graph_dist) / max(np.sum(weights * layout_dist ** 2), 1e-300)
+    return float(np.sum(weights * (scale * layout_dist - graph_dist) ** 2) / len(graph_dist))
+
+def coarsen_graph(nr_nodes, owner, neighbour, rng = None):
+    """
+    input: the number of nodes, the adjacency as owner and neighbour index arrays and the numpy Generator of the random order (see layout_rng)
+    output: the coarse node of every node, the number of coarse nodes and the adjacency of the coarse graph.
+    the nodes are visited in random order and merged with the unmatched neighbour of lowest degree (a maximal matching),
+    so hubs are merged last and the coarse graph stays balanced
+    """
+    order = np.argsort(owner, kind = "stable")
+    degrees = np.bincount(owner, minlength = nr_nodes)
+    indptr = np.zeros(nr_nodes + 1, dtype = np.int64)
+    np.cumsum(degrees, out = indptr[1:])
+    neighbours = neighbour[order].tolist()
+    indptr = indptr.tolist()
+    degrees = degrees.tolist()
+
+    mapping = [-1] * nr_nodes
+    nr_coarse_nodes = 0
+    if rng is None:
+        rng = layout_rng()[1]
+    for node in rng.permutation(nr_nodes).tolist():
+        if mapping[node] != -1:
+            continue
+        match = -1
+        for other in neighbours[indptr[node]:indptr[node + 1]]:
+            if other != node and mapping[other] == -1 and (match == -1 or degrees[other] < degrees[match]):
+                match = other
+        mapping[node] = nr_coarse_nodes
+        if match != -1:
+            mapping[match] = nr_coarse_nodes
+        nr_coarse_nodes += 1
+
+    mapping = np.array(mapping, dtype = np.int64)
+    coarse_owner = mapping[owner]
+    coarse_neighbour = mapping[neighbour]
+    pairs = np.unique(coarse_owner[coarse_owner != coarse_neighbour] * nr_coarse_nodes + coarse_neighbour[coarse_owner != coarse_neighbour])
+    return mapping, nr_coarse_nodes, pairs // nr_coarse_nodes, pairs % nr_coarse_nodes
+
+
+def force_iteration_numpy(width, height, x, y, state, mass, owner, neighbour, movable, delta_value, nr_vertices, repulsion = "exact", theta = 0.5, radius = None,
+                          sources = None, external_force = None, chunk_elements = 1 << 20):
+    """
+    one iteration of force_iteration for all nodes at once, x and y are updated in place.
+    owner and neighbour hold every adjacency list entry (see half_edge_arrays), movable marks the nodes that are moved.
+    the repulsion between the movable nodes is computed by repulsion_forces. when sources is given, the movable nodes are
+    repelled by the source nodes instead, which may include nodes that are not moved (like pinned nodes).
+    only the movable nodes get forces, temperatures and new positions, so the entries of owner that belong to other nodes can be left out.
+    external_force is a fixed (x, y) force per node that is added to the others, like the repulsion of far away nodes.
+    output: the energy of the layout, the sum of the squared force magnitudes of the movable nodes
+    """
+    t_max = 256
+    angle_osc = math.pi
+    angle_rot = math.pi / 3
+    sens_osc = 0.5
+    sens_rot = 1 / (2 * nr_vertices)
+    c_grav = 1/16
+
+    # the forces are only computed on the movable nodes
+    nodes = np.flatnonzero(movable)
+
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        # attractive forces along the edges, calc_attr_force_eades divided by the node mass
+        dx = x[neighbour] - x[owner]
+        dy = y[neighbour] - y[owner]
+        dist = np.hypot(dx, dy)
+        scale = np.where(dist != 0, 2 * np.log(dist / 128) / dist, 0) / mass[owner]
+        fx = np.bincount(owner, weights = scale * dx, minlength = len(x))[nodes]
+        fy = np.bincount(owner, weights = scale * dy, minlength = len(x))[nodes]
+
+        # repulsive forces between the movable nodes, calc_rep_force_eades
+        rep_fx, rep_fy = repulsion_forces(x, y, nodes if sources is None else sources, repulsion, theta = theta, radius = radius, rows = nodes, chunk_elements = chunk_elements)
+        fx += rep_fx
+        fy += rep_fy
+        if external_force is not None:
+            fx += external_force[0][nodes]
+            fy += external_force[1][nodes]
+
+        # barycenter term
+        bx = x.sum() / nr_vertices
+        by = y.sum() / nr_vertices
+        dx = x[nodes] - bx
+        dy = y[nodes] - by
+        dist = np.hypot(dx, dy)
+        fx += np.where(dist != 0, c_grav * mass[nodes] * dx / dist, 0)
+        fy += np.where(dist != 0, c_grav * mass[nodes] * dy / dist, 0)
+
+        # rotation and oscillation detection from the angle with the previous force
+        magnitude = np.hypot(fx, fy)
+        energy = float(np.sum(magnitude ** 2))
+        prev_fx = state["prev_fx"][nodes]
+        prev_fy = state["prev_fy"][nodes]
+        prev_magnitude = np.hypot(prev_fx, prev_fy)
+        cos_between = (np.where(magnitude != 0, fx / magnitude, 0) * np.where(prev_magnitude != 0, prev_fx / prev_magnitude, 0)
+                       + np.where(magnitude != 0, fy / magnitude, 0) * np.where(prev_magnitude != 0, prev_fy / prev_magnitude, 0))
+        angle = np.arccos(cos_between)
+        update = state["has_prev"][nodes]
+        skew = state["skew"][nodes]
+        temp = state["temp"][nodes]
+        rotating = update & (np.sin(angle) > math.sin(math.pi/2 + angle_rot/2))
+        skew[rotating] += sens_rot * np.sign(np.sin(angle[rotating]))
+        oscillating = update & (np.abs(np.cos(angle)) >= math.cos(angle_osc/2))
+        temp[oscillating] += sens_osc * np.cos(angle[oscillating])
+        temp[update] = np.minimum(temp[update] * (1 - np.abs(skew[update])), t_max)
+        state["skew"][nodes] = skew
+        state["temp"][nodes] = temp
+
+        # move every node by its temperature in the direction of its force
+        fx = np.where(magnitude != 0, temp * fx / magnitude, 0)
+        fy = np.where(magnitude != 0, temp * fy / magnitude, 0)
+
+    x[nodes] = np.clip(x[nodes] + delta_value * fx, -width/2, width/2)
+    y[nodes] = np.clip(y[nodes] + delta_value * fy, -height/2, height/2)
+    state["prev_fx"][nodes] = fx
+    state["prev_fy"][nodes] = fy
+    state["has_prev"][nodes] = True
+    return energy
+
+def displacement_plateau(trace, window = 10, tolerance = 0.1, jitter = 0.2):
+    """
+    input: the records of force_trace of one layout, the window size, a relative tolerance and the jitter fraction
+    output: True when the layout has converged: the net displacement (how far the nodes got over the window, per iteration)
+    averaged over the last window iterations differs less than tolerance (as a fraction) from the average over the window before,
+    and it is below jitter times the mean displacement, so the nodes only move back and forth around their place.
+    the step size alone does not plateau, it follows the temperature, and it is flat while the layout is still unfolding
+    """
+    if not tolerance or len(trace) < 3 * window:
+        return False
+    last = statistics.fmean(record["net_displacement"] for record in trace[-window:])
+    before = statistics.fmean(record["net_displacement"] for record in trace[-2 * window:-window])
+    step = statistics.fmean(record["mean_displacement"] for record in trace[-window:])
+    return abs(last - before) <= tolerance * before and last < jitter * step
+
+def print_force_trace(every = 1):
+    """
+    prints the statistics of force_trace, one line per every iterations
+    """
+    print("iteration  temperature  mean displacement  max displacement  net displacement  energy")
+    for i, record in enumerate(force_trace):
+        if i % every == 0 or i == len(force_trace) - 1:
+            print("{:>9}  {:>11.3f}  {:>17.3f}  {:>16.3f}  {:>16.3f}  {:.4g}".format(record["iteration"], record["temperature"], record["mean_displacement"],
+                                                                              record["max_displacement"], record["net_displacement"], record["energy"]))
+
+
+def repulsion_forces(x, y, nodes, repulsion = "exact", theta = 0.5, radius = None, rows = None, chunk_elements = 1 << 20):
+    """
+    input: coordinate arrays, the indices of the nodes that repel each other, the repulsion method
+    (theta is used by barnes_hut, the cutoff radius by grid) and the indices of the nodes to compute the repulsion on, by default all of nodes
+    output: the x and y repulsion on each of the rows
+    """
+    if repulsion == "exact":
+        return exact_repulsion(x, y, nodes, rows = rows, chunk_elements = chunk_elements)
+    elif repulsion == "barnes_hut":
+        return barnes_hut_repulsion(x, y, nodes, theta = theta, rows = rows)
+    elif repulsion == "grid":
+        return grid_repulsion(x, y, nodes, radius, rows = rows)
+    raise ValueError("Unsupported repulsion " + str(repulsion))
+
+def exact_repulsion(x, y, nodes, rows = None, chunk_elements = 1 << 20):
+    """
+    calc_rep_force_eades summed over all pairs, for the nodes in rows (by default all nodes) from all nodes.
+    the rows are handled in chunks, so no more than chunk_elements pairs are in memory at a time
+    """
+    if rows is None:
+        rows = nodes
+    xs = x[nodes]
+    ys = y[nodes]
+    fx = np.zeros(len(rows))
+    fy = np.zeros(len(rows))
+    step = max(1, chunk_elements // max(1, len(nodes)))
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        for start in range(0, len(rows), step):
+            chunk = rows[start:start + step]
+            dx = xs[None, :] - x[chunk, None]
+            dy = ys[None, :] - y[chunk, None]
+            dist2 = dx * dx + dy * dy
+            scale = np.where(dist2 != 0, 128 / (dist2 * np.sqrt(dist2)), 0)
+            fx[start:start + step] = (scale * dx).sum(axis = 1)
+            fy[start:start + step] = (scale * dy).sum(axis = 1)
+    return fx, fy
+
+def positions_in(nodes, rows, size):
+    """
+    input: node indices, indices of some of these nodes (rows) and the number of all nodes
+    output: the position of every row in nodes
+    """
+    position = np.full(size, -1, dtype = np.int64)
+    position[nodes] = np.arange(len(nodes))
+    return position[rows]
+
+def spread_bits(values):
+    """
+    input: an array of integers below 2**32
+    output: the same integers with a zero bit placed before every bit, used to interleave x and y into a morton key
+    """
+    values = values.astype(np.uint64)
+    values = (values | (values << np.uint64(16))) & np.uint64(0x0000FFFF0000FFFF)
+    values = (values | (values << np.uint64(8))) & np.uint64(0x00FF00FF00FF00FF)
+    values = (values | (values << np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    values = (values | (values << np.uint64(2))) & np.uint64(0x3333333333333333)
+    values = (values | (values << np.uint64(1))) & np.uint64(0x5555555555555555)
+    return values
+
+def build_quadtree(xs, ys, max_depth = 16):
+    """
+    input: coordinate arrays
+    output: the quadtree over the nodes as morton keys sorted along the tree (with the order that sorts the nodes),
+    the size of the root cell and per depth the keys, first sorted node, node counts and centers of the cells that contain nodes.
+    the tree is stored as arrays, the cells of a depth are the unique prefixes of the sorted morton keys
+    """
+    min_x = xs.min()
+    min_y = ys.min()
+    extent = max(xs.max() - min_x, ys.max() - min_y)
+    if extent == 0:
+        extent = 1
+    side = 1 << max_depth
+    qx = np.minimum(((xs - min_x) / extent * side).astype(np.int64), side - 1)
+    qy = np.minimum(((ys - min_y) / extent * side).astype(np.int64), side - 1)
+    keys = spread_bits(qx) | (spread_bits(qy) << np.uint64(1))
+    order = np.argsort(keys, kind = "stable")
+    keys = keys[order]
+    sorted_x = xs[order]
+    sorted_y = ys[order]
+
+    levels = []
+    for depth in range(max_depth + 1):
+        prefixes = keys >> np.uint64(2 * (max_depth - depth))
+        starts = np.flatnonzero(np.r_[True, prefixes[1:] != prefixes[:-1]])
+        counts = np.diff(np.r_[starts, len(keys)])
+        levels.append((prefixes[starts], starts, counts, np.add.reduceat(sorted_x, starts) / counts, np.add.reduceat(sorted_y, starts) / counts))
+    return keys, order, extent, levels
+
+def barnes_hut_repulsion(x, y, nodes, theta = 0.5, max_depth = 16, rows = None):
+    """
+    the repulsion of exact_repulsion, approximated with a quadtree that is built again for every call (so once per iteration).
+    the tree holds all nodes, but only the rows (by default all nodes) walk it.
+    a cell that does not contain the node and whose size over its distance to the node is below theta acts as all its nodes in its center.
+    the nodes in the smallest cells that are reached are used one by one, so nodes on the same spot are skipped like in exact_repulsion.
+    all nodes walk down the tree together, one depth at a time, so the work is O(n log n) array operations
+    """
+    xs = x[nodes]
+    ys = y[nodes]
+    nr_nodes = len(nodes)
+    positions = np.arange(nr_nodes) if rows is None else positions_in(nodes, rows, len(x))
+    if nr_nodes == 0 or len(positions) == 0:
+        return np.zeros(len(positions)), np.zeros(len(positions))
+    keys, order, extent, levels = build_quadtree(xs, ys, max_depth)
+    sorted_x = xs[order]
+    sorted_y = ys[order]
+    fx = np.zeros(nr_nodes)
+    fy = np.zeros(nr_nodes)
+
+    sorted_position = np.empty(nr_nodes, dtype = np.int64)
+    sorted_position[order] = np.arange(nr_nodes)
+    body = sorted_position[positions]
+    cell = np.zeros(len(body), dtype = np.int64)
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        for depth in range(max_depth + 1):
+            if len(body) == 0:
+                break
+            cell_keys, cell_starts, cell_counts, cell_x, cell_y = levels[depth]
+            counts = cell_counts[cell].astype(float)
+            if depth == max_depth:
+                # the smallest cells are split into their nodes
+                nr_members = cell_counts[cell]
+                members = np.repeat(cell_starts[cell], nr_members) + np.arange(nr_members.sum()) - np.repeat(np.cumsum(nr_members) - nr_members, nr_members)
+                body = np.repeat(body, nr_members)
+                counts = np.ones(len(body))
+                dx = sorted_x[members] - sorted_x[body]
+                dy = sorted_y[members] - sorted_y[body]
+            else:
+                dx = cell_x[cell] - sorted_x[body]
+                dy = cell_y[cell] - sorted_y[body]
+            dist2 = dx * dx + dy * dy
+            if depth == max_depth:
+                accept = np.ones(len(body), dtype = bool)
+            else:
+                size = extent / (1 << depth)
+                contains = (keys[body] >> np.uint64(2 * (max_depth - depth))) == cell_keys[cell]
+                accept = ~contains & ((counts == 1) | (size * size < theta * theta * dist2))
+                expand = ~accept & ~(contains & (counts == 1))
+            accept &= dist2 != 0
+            scale = counts[accept] * 128 / (dist2[accept] * np.sqrt(dist2[accept]))
+            fx += np.bincount(body[accept], weights = scale * dx[accept], minlength = nr_nodes)
+            fy += np.bincount(body[accept], weights = scale * dy[accept], minlength = nr_nodes)
+
+            if depth < max_depth:
+                # continue with the children of the opened cells
+                body = body[expand]
+                parents = levels[depth + 1][0] >> np.uint64(2)
+                first = np.searchsorted(parents, cell_keys[cell[expand]], side = "left")
+                nr_children = np.searchsorted(parents, cell_keys[cell[expand]], side = "right") - first
+                body = np.repeat(body, nr_children)
+                cell = np.repeat(first, nr_children) + np.arange(len(body)) - np.repeat(np.cumsum(nr_children) - nr_children, nr_children)
+
+    rep_fx = np.empty(nr_nodes)
+    rep_fy = np.empty(nr_nodes)
+    rep_fx[order] = fx
+    rep_fy[order] = fy
+    return rep_fx[positions], rep_fy[positions]
+
+def grid_repulsion(x, y, nodes, radius, rows = None):
+    """
+    the repulsion of exact_repulsion from the nodes closer than radius only, on the rows (by default all nodes).
+    the nodes are put in a uniform grid of cells of radius wide (a cell list), so every node only looks at the nodes in its own and the 8 surrounding cells.
+    on an evenly spread layout this is close to linear in the number of nodes
+    """
+    xs = x[nodes]
+    ys = y[nodes]
+    nr_nodes = len(nodes)
+    bodies = np.arange(nr_nodes) if rows is None else positions_in(nodes, rows, len(x))
+    fx = np.zeros(nr_nodes)
+    fy = np.zeros(nr_nodes)
+    if nr_nodes == 0 or len(bodies) == 0 or not radius > 0:
+        return fx[bodies], fy[bodies]
+
+    column = ((xs - xs.min()) // radius).astype(np.int64)
+    row = ((ys - ys.min()) // radius).astype(np.int64)
+    nr_rows = row.max() + 1
+    nr_columns = column.max() + 1
+    cell = column * nr_rows + row
+    order = np.argsort(cell, kind = "stable")
+    sorted_cells = cell[order]
+
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        for column_offset in (-1, 0, 1):
+            for row_offset in (-1, 0, 1):
+                other_column = column[bodies] + column_offset
+                other_row = row[bodies] + row_offset
+                inside = (other_column >= 0) & (other_column < nr_columns) & (other_row >= 0) & (other_row < nr_rows)
+                body = bodies[inside]
+                other_cell = other_column[inside] * nr_rows + other_row[inside]
+                first = np.searchsorted(sorted_cells, other_cell, side = "left")
+                nr_others = np.searchsorted(sorted_cells, other_cell, side = "right") - first
+                body = np.repeat(body, nr_others)
+                other = order[np.repeat(first, nr_others) + np.arange(len(body)) - np.repeat(np.cumsum(nr_others) - nr_others, nr_others)]
+                dx = xs[other] - xs[body]
+                dy = ys[other] - ys[body]
+                dist2 = dx * dx + dy * dy
+                close = (dist2 != 0) & (dist2 < radius * radius)
+                scale = 128 / (dist2[close] * np.sqrt(dist2[close]))
+                fx += np.bincount(body[close], weights = scale * dx[close], minlength = nr_nodes)
+                fy += np.bincount(body[close], weights = scale * dy[close], minlength = nr_nodes)
+    return fx[bodies], fy[bodies]
+
+def repulsion_error(x, y, nodes, repulsion, theta = 0.5, radius = None, sample = 1000):
+    """
+    input: coordinate arrays, the indices of the nodes that repel each other and an approximate repulsion method
+    output: the relative error of the approximation, the norm of the difference with the exact repulsion over the norm of the exact repulsion,
+    measured on at most sample nodes
+    """
+    approx_fx, approx_fy = repulsion_forces(x, y, nodes, repulsion, theta = theta, radius = radius)
+    rows = np.arange(len(nodes))
+    if len(rows) > sample:
+        rows = np.sort(np.random.default_rng(0).choice(len(rows), sample, replace = False))
+    exact_fx, exact_fy = exact_repulsion(x, y, nodes, rows = nodes[rows])
+    exact_norm = math.sqrt(np.sum(exact_fx * exact_fx + exact_fy * exact_fy))
+    if exact_norm == 0:
+        return 0.0
+    return math.sqrt(np.sum((approx_fx[rows] - exact_fx) ** 2 + (approx_fy[rows] - exact_fy) ** 2)) / exact_norm
+
 def calc_sum_force(current_id, old_coords_tuple, old_coordinates_dict, area, nr_vertices, C, use_barycenter, barycenter, local_adjacency_dict, local_adjacencies, use_mass = True):
     #adj_nodes = calc_direct_children() #to check again          # need node list and parent id  # this only works for a tree structure
     adj_nodes = []
@@ -813,8 +2554,15 @@ def calc_attr_imp(length, chosen_node, node2, node_mass):
 def calc_DAG(width, height, dfs_trees, adjacency_dict, perform_crossing_minimization = True, minimization_method = "median", straighten_edges = True, printing = False):
     #main function of DAG
 
+    # the layering works on integer node ids, dummy nodes get the integers after the real nodes
+    node_ids, adjacency_dict = intern_adjacency(adjacency_dict)
+    node_index = {id: i for i, id in enumerate(node_ids)}
+    dfs_trees = [[(node_index.get(parent), node_index.get(node)) for parent, node in dfs] for dfs in dfs_trees]
+    label_order = sorted(range(len(node_ids)), key = node_ids.__getitem__)
+    label_rank = {i: rank for rank, i in enumerate(label_order)}       # ties are broken by node id as before
+
     #first remove the cycles in the DAG
-    vertex_sequence = create_vertex_seqeuence_eades(adjacency_dict)
+    vertex_sequence = create_vertex_seqeuence_eades(adjacency_dict, label_rank)
     if printing:
         print("newly created vertex sequence is:", vertex_sequence)
 
@@ -882,7 +2630,7 @@ def calc_DAG(width, height, dfs_trees, adjacency_dict, perform_crossing_minimiza
     for node_id in adjacency_dict.keys():
         x_value = x_coords_dict[node_id]
         y_value = y_coords_dict[node_id]
-        coordinates[node_id] = (x_value, y_value)
+        coordinates[node_ids[node_id]] = (x_value, y_value)
         #print("final x_coordinate of node",node_id," is now",x_coords_dict[node_id])
 
     
@@ -945,7 +2693,7 @@ def calc_DAG(width, height, dfs_trees, adjacency_dict, perform_crossing_minimiza
 
             #print("the optimization attribute of edge from",edge[0],"to", edge[1], "is:",original_distance,"for coordinates",dummy_x_coords)
             if original_distance > 0:
-                result = scipy.optimize.minimize(fun = dummies_distance_sum, x0 = dummy_x_coords, args = (straight_positions), bounds = boundaries)
+                result = lazy_import("scipy.optimize").minimize(fun = dummies_distance_sum, x0 = dummy_x_coords, args = (straight_positions), bounds = boundaries)
 
                 dummy_x_coords = result.x
             
@@ -958,6 +2706,8 @@ def calc_DAG(width, height, dfs_trees, adjacency_dict, perform_crossing_minimiza
                     point.setX(dummy_x_coords[i-1])
 
             #print("the optimization attribute of edge from",edge[0],"to", edge[1], "is now:",dummies_distance_sum(dummy_x_coords, straight_positions),"for new coordinates",dummy_x_coords)
+
+    edge_waypoints = {(node_ids[start], node_ids[end], weight): path for (start, end, weight), path in edge_waypoints.items()}
         
     return coordinates, edge_waypoints #and something else such that it can read the directions of the edges?
 
@@ -1035,7 +2785,10 @@ def calc_source_list(adjacency_dict):
 
     return source_list
 
-def create_vertex_seqeuence_eades(adjacency_dict):
+def create_vertex_seqeuence_eades(adjacency_dict, rank = None):
+    """
+    rank optionally gives every vertex its position in the tie breaking order, by default the vertices themselves are compared
+    """
     source_list = calc_source_list(adjacency_dict)
     sink_list = calc_sink_list(adjacency_dict)
     vertices = list(adjacency_dict.keys())
@@ -1068,7 +2821,10 @@ def create_vertex_seqeuence_eades(adjacency_dict):
                 outdegree = outgoing_edges[vertex]
                 delta = outdegree - indegree
                 u_list[vertex] = delta
-            u = max(zip(u_list.values(), u_list.keys()))[1]
+            if rank is None:
+                u = max(zip(u_list.values(), u_list.keys()))[1]
+            else:
+                u = max(u_list.keys(), key = lambda vertex: (u_list[vertex], rank[vertex]))
             # print("u list after", u_list)
             # print("incoming edges", incoming_edges)
             # print("outgoing edges", outgoing_edges)
@@ -1088,7 +2844,7 @@ def create_vertex_seqeuence_eades(adjacency_dict):
 
 def reverse_edges(vertex_sequence, adjacency_dict):
     reversed_list = [] #a list of (x,y) which indicate that the edge between xy has been reversed
-    acyclic_adjacency_dict = copy.deepcopy(adjacency_dict)
+    acyclic_adjacency_dict = {id: list(edges) for id, edges in adjacency_dict.items()}      # the edge tuples are not changed, only the lists
     #print("adjacency dict has edges of 16 be",adjacency_dict["16"])
     for index, vertex in enumerate(vertex_sequence):
         edges = acyclic_adjacency_dict[vertex]
@@ -1480,7 +3236,11 @@ def get_layer_neighbours(dummy_adjacency_dict, previous_layer, current_layer, de
 
 
 
-def create_dummy_nodes(layer_dict, nodes_per_layer, acyclic_adjacency_dict, reversed_list, printing = False):
+def create_dummy_nodes(layer_dict, nodes_per_layer, acyclic_adjacency_dict, reversed_list, printing = False, track_edge = None):
+    """
+    the node ids are integers, every dummy node gets a new integer after the largest node id.
+    with printing on, the creation of the dummy nodes of track_edge (a pair of node ids) is printed
+    """
 
   # the order of layer N is the list that is gotten by calling dummy_nodes_per_layer[N]
     
@@ -1489,6 +3249,11 @@ def create_dummy_nodes(layer_dict, nodes_per_layer, acyclic_adjacency_dict, reve
     dummy_layer_dict = copy.deepcopy(layer_dict)
 
     node_waypoints_ids = {}             # key: list of edges where edge is (start_node_id, end_node_id, weight); value: [start_node_id, dummy_node1_id, dummy_node2_id, end_node_id]
+    dummy_ids = {}                      # key: (start_node_id, end_node_id, layer); value: integer id of the dummy node of that edge in that layer
+    first_dummy_id = max(acyclic_adjacency_dict.keys(), default = -1) + 1
+
+    def get_dummy_id(start_node_id, end_node_id, layer):
+        return dummy_ids.setdefault((start_node_id, end_node_id, layer), first_dummy_id + len(dummy_ids))
 
     if printing:
         print("reversed list is", reversed_list)
@@ -1501,7 +3266,7 @@ def create_dummy_nodes(layer_dict, nodes_per_layer, acyclic_adjacency_dict, reve
             start_node_id = original_start_node
             end_node_id = edge[0]
 
-            if ((start_node_id == "1" and end_node_id == "5") or (start_node_id == "5" and end_node_id == "1")) and printing:
+            if track_edge is not None and {start_node_id, end_node_id} == set(track_edge) and printing:
                 track_creation = True
                 print("tracking edge from",start_node_id, "to",end_node_id)
                 print("edges:",edges,"starting from",start_node_id)
@@ -1534,7 +3299,7 @@ def create_dummy_nodes(layer_dict, nodes_per_layer, acyclic_adjacency_dict, reve
                 node_waypoints_ids[(start_node_id, end_node_id, weight)] = [start_node_id]         
 
                 if start_node_id == end_node_id:
-                    raise ValueError("nodes are the same, "+start_node_id)
+                    raise ValueError("nodes are the same, "+str(start_node_id))
 
                 start_layer = layer_dict[start_node_id]
                 end_layer = layer_dict[end_node_id]
@@ -1561,22 +3326,22 @@ def create_dummy_nodes(layer_dict, nodes_per_layer, acyclic_adjacency_dict, reve
                         else:
                             dummy_layer = start_layer - count - 1
 
-                        dummy_id = "dummy " + start_node_id + " to " + end_node_id + " in layer " + str(dummy_layer)
+                        dummy_id = get_dummy_id(start_node_id, end_node_id, dummy_layer)
 
                         if count == (layer_difference - 2):
                             target_id = end_node_id
                         elif upwards:
-                            target_id = "dummy " + start_node_id + " to " + end_node_id + " in layer " + str(dummy_layer + 1)
+                            target_id = get_dummy_id(start_node_id, end_node_id, dummy_layer + 1)
                         else:
-                            target_id = "dummy " + start_node_id + " to " + end_node_id + " in layer " + str(dummy_layer - 1)
+                            target_id = get_dummy_id(start_node_id, end_node_id, dummy_layer - 1)
 
                         if printing_mode or track_creation:
                             print("trying to create", dummy_id)
                             
                     
-                        if dummy_id not in dummy_nodes_per_layer[dummy_layer]:
+                        if dummy_id not in dummy_layer_dict:
                             if start_node_id == end_node_id:
-                                raise ValueError(start_node_id+" and "+end_node_id+" are equal")
+                                raise ValueError(str(start_node_id)+" and "+str(end_node_id)+" are equal")
                             if track_creation:
                                 print("just before append:",start_node_id,end_node_id)
                             node_waypoints_ids[(start_node_id, end_node_id, weight)].append(dummy_id)
@@ -1668,35 +3433,473 @@ def convert_to_similarity_matrix(distance_matrix):
                 sim_matrix[i][j] = sim
     return sim_matrix
 
-def get_tsne_coordinates(dist_matrix, index_node_dict):
-    d_matrix = np.nan_to_num(dist_matrix, posinf=3333333333) 
-    coordinates_proj = {}
-    #print(d_matrix)
-    #delete last row and column of distance matrix such that the disconnected node is not taken into account
-    projection = TSNE(n_components=2, learning_rate='auto', init='pca', 
-                      perplexity=15, early_exaggeration=30, n_iter=1500).fit_transform(d_matrix[:-1, :-1])
-    # perplexity = 15 in slides, 30 looks nice
+def create_tsne_coordinates(width, height, adjacency_dict, initial_coords = None, seed = None):
+    """
+    input: width and height of the layout area, an adjacency dict (or AdjacencyView), optionally the coordinates to start from
+    (a dict or LayoutState, like create_pivot_mds_coordinates, see warm_start_positions for nodes it does not have) instead of PCA, and the seed of t-SNE (see layout_rng)
+    output: LayoutState of the t-SNE projection of the rows of the graph distance matrix (see graph_distance_matrix), scaled to fit the area.
+    t-SNE needs more nodes than its perplexity, smaller graphs get a pivot MDS layout
+    """
+    perplexity = 15                 # 15 in slides, 30 looks nice
+    seed = layout_rng(seed)[0]
+    node_ids, dist_matrix = graph_distance_matrix(adjacency_dict)
+    if len(node_ids) <= perplexity:
+        return create_pivot_mds_coordinates(width, height, adjacency_dict)
+    d_matrix = np.nan_to_num(dist_matrix, posinf=3333333333)
+    init = 'pca'
+    if initial_coords is not None:
+        # scaled like the PCA start of sklearn, a standard deviation of 1e-4 in the first dimension
+        init = warm_start_positions(initial_coords, node_ids, weighted_adjacency_matrix(adjacency_dict)[1], aspect = width / height)
+        init = (init - init.mean(axis = 0)) / max(np.std(init[:, 0]), 1e-300) * 1e-4
+    projection = lazy_import("sklearn.manifold").TSNE(n_components=2, learning_rate='auto', init=init,
+                      perplexity=perplexity, early_exaggeration=30, n_iter=1500, random_state=seed).fit_transform(d_matrix)
     # other parameters..
+    projection = fit_to_area(projection, width, height)
+    return LayoutState(node_ids, projection[:, 0], projection[:, 1], seed)
 
-    for index in range(projection.shape[0]):
-        node_id = index_node_dict[index]
-        x_cor = projection[index][0]
-        y_cor = projection[index][1]
-        coordinates_proj[node_id] = (x_cor, y_cor)
+def create_isomap_coordinates(width, height, adjacency_dict, seed = None):
+    """
+    input: width and height of the layout area, an adjacency dict (or AdjacencyView) and the seed of the eigensolver of ISOMAP (see layout_rng)
+    output: LayoutState of the ISOMAP projection of the rows of the graph distance matrix (see graph_distance_matrix), scaled to fit the area.
+    ISOMAP needs more nodes than its number of neighbours, smaller graphs get a pivot MDS layout
+    """
+    n_neighbors = 6
+    seed = layout_rng(seed)[0]
+    node_ids, dist_matrix = graph_distance_matrix(adjacency_dict)
+    if len(node_ids) <= n_neighbors:
+        return create_pivot_mds_coordinates(width, height, adjacency_dict)
+    d_matrix = np.nan_to_num(dist_matrix, posinf=333333333333)
+    with numpy_random_seed(seed):         # Isomap has no random_state, its eigensolver starts from np.random on large graphs
+        projection = lazy_import("sklearn.manifold").Isomap(n_components=2, n_neighbors=n_neighbors).fit_transform(d_matrix)
+    projection = fit_to_area(projection, width, height)
+    return LayoutState(node_ids, projection[:, 0], projection[:, 1], seed)
 
-    return coordinates_proj, projection
+def max_min_pivots(distances_from, first, nr_nodes, nr_pivots):
+    """
+    input: a function that gives the distances from a node to all nodes, the first pivot and the numbers of nodes and pivots
+    output: the list of pivots and the nr_nodes x nr_pivots matrix of the distances to them. every next pivot is the node
+    furthest from the pivots so far, nodes that cannot be reached from them come first, so every connected component gets pivots
+    """
+    pivots = [first]
+    pivot_dist = np.empty((nr_nodes, nr_pivots))
+    nearest = np.full(nr_nodes, np.inf)
+    for column in range(nr_pivots):
+        pivot_dist[:, column] = distances_from(pivots[-1])
+        nearest = np.minimum(nearest, pivot_dist[:, column])
+        if column + 1 < nr_pivots:
+            pivots.append(int(np.argmax(nearest)))
+    return pivots, pivot_dist
+
+def pivot_mds(pivot_dist, dimensions = 2):
+    """
+    input: nr_nodes x nr_pivots matrix of finite distances from every node to the pivots (see max_min_pivots)
+    output: nr_nodes x dimensions array of positions whose distances approximate the distances (pivot MDS of Brandes and Pich).
+    the squared distances are double centered and multiplied with the largest eigenvectors of their nr_pivots x nr_pivots inner
+    product matrix, so only that small matrix is decomposed. with every node as a pivot this is classical MDS
+    """
+    squared = pivot_dist ** 2
+    centered = -(squared - squared.mean(axis = 0) - squared.mean(axis = 1)[:, None] + squared.mean()) / 2
+    values, vectors = np.linalg.eigh(centered.T @ centered)
+    order = np.argsort(values)[::-1][:dimensions]
+    positions = np.zeros((len(pivot_dist), dimensions))
+    # centered times an eigenvector has the length of the square root of its eigenvalue, which is the square of the eigenvalue
+    # of classical MDS, scaling to the fourth root of the eigenvalue gives the positions of classical MDS
+    positions[:, :len(order)] = centered @ vectors[:, order] / np.maximum(values[order], 1e-300) ** 0.25
+    return positions
+
+def fit_to_area(positions, width, height):
+    """
+    input: nr_nodes x 2 array of positions and the width and height of the layout area
+    output: the positions scaled by the same factor in both directions to fill the area, centered at 0
+    """
+    low = positions.min(axis = 0)
+    high = positions.max(axis = 0)
+    extent = np.maximum(high - low, 1e-300)
+    return (positions - (high + low) / 2) * min(width / extent[0], height / extent[1])
 
-def get_isomap_coordinates(dist_matrix, index_node_dict):
-    d_matrix = np.nan_to_num(dist_matrix, posinf=333333333333)
-#    print((d_matrix==d_matrix.T).all())
-    #delete last row and column of distance matrix such that the disconnected node is not taken into account
-    projection = Isomap(n_components=2, n_neighbors=6).fit_transform(d_matrix[:-1,:-1])
-    coordinates_proj = {}
-
-    for index in range(projection.shape[0]):
-        node_id = index_node_dict[index]
-        x_cor = projection[index][0]
-        y_cor = projection[index][1]
-        coordinates_proj[node_id] = (x_cor, y_cor)
-
-    return coordinates_proj, projection
\ No newline at end of file
+def pack_rectangles(widths, heights, gap = 0, aspect = 1):
+    """
+    input: arrays with the widths and heights of rectangles, the gap to keep between them and the width over height of the area to fill
+    output: x and y arrays of the lower left corners of the rectangles when they are put next to each other in rows (shelves),
+    the highest rectangles first, with rows about as wide as needed to fill an area of the given aspect
+    """
+    widths = np.asarray(widths, dtype = float)
+    heights = np.asarray(heights, dtype = float)
+    x = np.zeros(len(widths))
+    y = np.zeros(len(widths))
+    if len(widths) == 0:
+        return x, y
+    row_width = max(math.sqrt(np.sum((widths + gap) * (heights + gap)) * aspect), widths.max())
+    cursor_x = 0
+    cursor_y = 0
+    row_height = 0
+    for i in np.argsort(-heights, kind = "stable").tolist():
+        if cursor_x > 0 and cursor_x + widths[i] > row_width:
+            cursor_x = 0
+            cursor_y += row_height + gap
+            row_height = 0
+        x[i] = cursor_x
+        y[i] = cursor_y
+        cursor_x += widths[i] + gap
+        row_height = max(row_height, heights[i])
+    return x, y
+
+def pivot_mds_positions(matrix, nr_pivots = None, aspect = 1):
+    """
+    input: the sparse weighted adjacency matrix of weighted_adjacency_matrix, the number of pivots (by default pivot_mds_pivots)
+    and the width over height of the layout area
+    output: nr_nodes x 2 array of pivot MDS positions in graph distance units. every connected component gets its own pivot MDS
+    with a share of the pivots by its size, and the components are put next to each other with pack_rectangles, one unit apart
+    """
+    if nr_pivots is None:
+        nr_pivots = pivot_mds_pivots
+    csgraph = lazy_import("scipy.sparse.csgraph")
+    nr_nodes = matrix.shape[0]
+    nr_components, labels = csgraph.connected_components(matrix, directed = False)
+    order = np.argsort(labels, kind = "stable")
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(labels, minlength = nr_components))))
+
+    positions = np.zeros((nr_nodes, 2))
+    low = np.zeros((nr_components, 2))
+    extent = np.zeros((nr_components, 2))
+    for component in range(nr_components):
+        nodes = order[bounds[component]:bounds[component + 1]]
+        if len(nodes) == 1:
+            continue
+        component_matrix = matrix[nodes][:, nodes]
+        component_pivots = min(len(nodes), max(3, round(nr_pivots * len(nodes) / nr_nodes)))
+        pivots, pivot_dist = max_min_pivots(lambda pivot: csgraph.shortest_path(component_matrix, method = "D", directed = False, indices = pivot),
+                                            int(np.argmax(np.diff(component_matrix.indptr))), len(nodes), component_pivots)
+        positions[nodes] = pivot_mds(pivot_dist)
+        low[component] = positions[nodes].min(axis = 0)
+        extent[component] = positions[nodes].max(axis = 0) - low[component]
+
+    if nr_components > 1:
+        offset_x, offset_y = pack_rectangles(extent[:, 0], extent[:, 1], gap = 1, aspect = aspect)
+        positions += np.column_stack((offset_x, offset_y))[labels] - low[labels]
+    return positions
+
+def warm_start_positions(initial_coords, node_ids, matrix, aspect = 1):
+    """
+    input: the coordinates to start from (a dict or LayoutState), the node ids and sparse weighted adjacency matrix of weighted_adjacency_matrix
+    and the width over height of the layout area
+    output: nr_nodes x 2 array with the positions of initial_coords in the order of node_ids. nodes that are not in initial_coords, like the
+    nodes a layout left out, get their pivot MDS position (see pivot_mds_positions) rotated, scaled and moved to fit the other nodes best,
+    with a small jitter so they do not land on the same place
+    """
+    initial = LayoutState.from_coordinates(initial_coords)
+    known = np.fromiter((id in initial.node_index for id in node_ids), dtype = bool, count = len(node_ids))
+    positions = np.zeros((len(node_ids), 2))
+    columns = initial.indices([id for id, is_known in zip(node_ids, known.tolist()) if is_known])
+    positions[known] = np.column_stack((initial.x[columns], initial.y[columns]))
+    if known.all():
+        return positions
+
+    mds = pivot_mds_positions(matrix, aspect = aspect)
+    rotation = np.eye(2)
+    scale = 1
+    mds_center = np.zeros(2)
+    center = np.zeros(2)
+    if known.any():
+        mds_center = mds[known].mean(axis = 0)
+        center = positions[known].mean(axis = 0)
+    if known.sum() > 1:
+        # the rotation and scale that map the pivot MDS positions of the known nodes closest onto their positions (procrustes)
+        mds_known = mds[known] - mds_center
+        u, singular_values, vt = np.linalg.svd(mds_known.T @ (positions[known] - center))
+        rotation = u @ vt
+        scale = singular_values.sum() / max(np.sum(mds_known ** 2), 1e-300)
+    spread = max(np.abs(positions[known] - center).max() if known.any() else 0, 1)
+    jitter = np.random.default_rng(0).normal(scale = 1e-3 * spread, size = (np.count_nonzero(~known), 2))
+    positions[~known] = (mds[~known] - mds_center) @ rotation * scale + center + jitter
+    return positions
+
+def create_pivot_mds_coordinates(width, height, adjacency_dict, nr_pivots = None):
+    """
+    input: width and height of the layout area, an adjacency dict (or AdjacencyView) and the number of pivots, by default pivot_mds_pivots
+    output: LayoutState of a pivot MDS layout of the graph distances (see pivot_mds_positions), scaled to fit the area. it takes one
+    shortest path search per pivot and a small eigendecomposition, so it is close to linear in the size of the graph and
+    a good start for the force, stress and t-SNE layouts on large graphs
+    """
+    node_ids, matrix = weighted_adjacency_matrix(adjacency_dict)
+    if len(node_ids) < 2:
+        return LayoutState(node_ids)
+    positions = fit_to_area(pivot_mds_positions(matrix, nr_pivots, aspect = width / height), width, height)
+    return LayoutState(node_ids, positions[:, 0], positions[:, 1])
+
+def create_stress_majorization_coordinates(width, height, adjacency_dict, initial_coords = None, max_iterations = 100, tolerance = None):
+    """
+    input: width and height of the layout area, an adjacency dict (or AdjacencyView), optionally the coordinates to start from
+    (a dict or LayoutState, by default pivot_mds_positions, see warm_start_positions for nodes it does not have), the maximum number of iterations and the relative tolerance (by default stress_tolerance)
+    output: LayoutState of a stress majorization (SMACOF) layout, which fits the layout distances to the graph distances of graph_distance_matrix
+    with a weight of 1/d² per pair. every iteration is a Guttman transform, which never increases the stress, and the layout stops when an
+    iteration lowers the stress by less than tolerance as a fraction. a new layout is scaled to fit the area, a layout from initial_coords
+    keeps its size and centre. the distance and weight matrices take n² memory, so this is meant for graphs up to a few thousand nodes
+    """
+    if tolerance is None:
+        tolerance = stress_tolerance
+    node_ids, matrix = weighted_adjacency_matrix(adjacency_dict)
+    dist = lazy_import("scipy.sparse.csgraph").shortest_path(matrix, method = "D", directed = False)
+    nr_nodes = len(node_ids)
+    if nr_nodes < 2:
+        return LayoutState(node_ids)
+
+    # nodes that are not connected are kept a bit further apart than the furthest connected ones
+    connected = np.isfinite(dist)
+    if not connected.all():
+        dist[~connected] = dist[connected].max() + 1
+    with np.errstate(divide = "ignore"):
+        weights = np.where(dist > 0, 1 / dist ** 2, 0)
+    weighted_dist = weights * dist
+
+    if initial_coords is None:
+        # nodes with the same distances to all others, like isolated nodes, get the same position and would never separate, so they are moved apart a little
+        z = pivot_mds_positions(matrix, aspect = width / height) + np.random.default_rng(0).normal(scale = 1e-3 * dist.mean(), size = (nr_nodes, 2))
+        center = np.zeros(2)
+    else:
+        z = warm_start_positions(initial_coords, node_ids, matrix, aspect = width / height)
+        center = z.mean(axis = 0)
+        z = z - center
+
+    # the layout is brought to the length of the graph distances with the scale that fits them best
+    layout_dist = np.hypot(z[:, 0, None] - z[None, :, 0], z[:, 1, None] - z[None, :, 1])
+    scale = np.sum(weighted_dist * layout_dist) / max(np.sum(weights * layout_dist ** 2), 1e-300)
+    z *= scale
+    layout_dist *= scale
+    stress = np.sum(weights * (layout_dist - dist) ** 2) / 2
+
+    # the Guttman transform solves laplacian z = B(z) z. the laplacian of the weights is singular, as moving all nodes does not change
+    # the stress, adding 1/n to every entry makes it invertible and gives the same solution centered at 0
+    laplacian = -weights
+    laplacian[np.diag_indices(nr_nodes)] = weights.sum(axis = 1)
+    linalg = lazy_import("scipy.linalg")
+    factor = linalg.cho_factor(laplacian + 1 / nr_nodes)
+
+    iteration_count = 0
+    while iteration_count < max_iterations:
+        # nodes that are (almost) on top of each other do not pull each other, dividing by their tiny distance would only add rounding errors
+        with np.errstate(divide = "ignore", invalid = "ignore"):
+            b_matrix = -np.where(layout_dist > 1e-9 * dist.max(), weighted_dist / layout_dist, 0)
+        b_matrix[np.diag_indices(nr_nodes)] = -b_matrix.sum(axis = 1)
+        z = linalg.cho_solve(factor, b_matrix @ z)
+        iteration_count += 1
+
+        layout_dist = np.hypot(z[:, 0, None] - z[None, :, 0], z[:, 1, None] - z[None, :, 1])
+        new_stress = np.sum(weights * (layout_dist - dist) ** 2) / 2
+        converged = stress - new_stress <= tolerance * stress
+        stress = new_stress
+        if converged:
+            break
+    if printing_mode:
+        print("stress majorization stopped after", iteration_count, "iterations with stress", stress)
+
+    if initial_coords is None:
+        z = fit_to_area(z, width, height)
+    else:
+        z = z / scale + center
+    return LayoutState(node_ids, z[:, 0], z[:, 1])
+
+
+def connected_components(adjacency_dict):
+    """
+    input: an adjacency dict (or AdjacencyView)
+    output: list with the node ids of every connected component (edges in either direction connect), the largest component first
+    """
+    node_ids, matrix = weighted_adjacency_matrix(adjacency_dict)
+    nr_components, labels = lazy_import("scipy.sparse.csgraph").connected_components(matrix, directed = False)
+    order = np.argsort(labels, kind = "stable").tolist()
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(labels, minlength = nr_components)))).tolist()
+    components = [[node_ids[i] for i in order[bounds[k]:bounds[k + 1]]] for k in range(nr_components)]
+    components.sort(key = len, reverse = True)
+    return components
+
+def component_adjacency(adjacency_dict, node_ids):
+    """
+    input: an adjacency dict (or AdjacencyView) and the node ids of one or more of its connected components
+    output: the adjacency of only these nodes, an AdjacencyView of a smaller CSRGraph when the input is an AdjacencyView
+    """
+    if isinstance(adjacency_dict, AdjacencyView):
+        return AdjacencyView(adjacency_dict.csr.subgraph(node_ids))
+    return {id: adjacency_dict[id] for id in node_ids}
+
+def component_shares(sizes):
+    """
+    input: the number of nodes of every component
+    output: the fraction of the width and height of the layout area every component gets, so its area is proportional to its number
+    of nodes and the ideal edge length (calc_ideal_length) is about the same in all components
+    """
+    total = sum(sizes)
+    return [math.sqrt(size / total) for size in sizes]
+
+def layout_components(layout, width, height, arguments, sizes, processes = None, seed = None, **settings):
+    """
+    input: a layout function, the width and height of the layout area, per component a dict with the keyword arguments that tell
+    layout which component to lay out, the number of nodes of every component, the number of worker processes and the other settings of layout
+    output: the results of layout(share * width, share * height, **arguments, **settings) for every component, with the shares of component_shares.
+    components with at least component_parallel_nodes nodes are laid out in parallel in a process pool when there are several of them,
+    the small ones in this process meanwhile. every component gets its own seed drawn from seed (see layout_rng), which np.random is seeded with
+    during its layout, so the layouts that draw their seed from np.random are repeated by the same seed
+    """
+    shares = component_shares(sizes)
+    seed, rng = layout_rng(seed)
+    seeds = rng.integers(2**31, size = len(arguments)).tolist()
+    large = [k for k in range(len(arguments)) if sizes[k] >= component_parallel_nodes]
+    results = [None] * len(arguments)
+    if processes != 1 and len(large) > 1:
+        with ProcessPoolExecutor(max_workers = processes) as executor:
+            futures = {k: executor.submit(layout_of_component, layout, width * shares[k], height * shares[k], arguments[k], settings, seeds[k]) for k in large}
+            for k in range(len(arguments)):
+                if k not in futures:
+                    results[k] = layout_of_component(layout, width * shares[k], height * shares[k], arguments[k], settings, seeds[k])
+            for k, future in futures.items():
+                results[k] = future.result()
+    else:
+        for k in range(len(arguments)):
+            results[k] = layout_of_component(layout, width * shares[k], height * shares[k], arguments[k], settings, seeds[k])
+    return results
+
+def layout_of_component(layout, width, height, arguments, settings, seed):
+    """
+    worker of layout_components: the layout of one component from the given seed
+    """
+    with numpy_random_seed(seed):
+        return layout(width, height, **arguments, **settings)
+
+@contextmanager
+def numpy_random_seed(seed):
+    """
+    seeds np.random for code that draws from it, like the layouts without a seed or scikit-learn without a random_state,
+    and puts back its state afterwards, so the random numbers of the rest of the session do not change
+    """
+    state = np.random.get_state()
+    np.random.seed(seed)
+    try:
+        yield
+    finally:
+        np.random.set_state(state)
+
+def pack_layouts(layout_states, width, height, gap = None):
+    """
+    input: a LayoutState per component, the width and height of the layout area and the gap between the components (by default component_gap)
+    output: per component the x and y it has to be moved by to put the bounding boxes of the components next to each other (see pack_rectangles),
+    with the whole centered at 0, and the factor to multiply the moved positions by, which is below 1 when they would not fit in the area otherwise
+    """
+    if gap is None:
+        gap = component_gap
+    low = np.array([(state.x.min(), state.y.min()) if len(state) else (0, 0) for state in layout_states], dtype = float).reshape(-1, 2)
+    high = np.array([(state.x.max(), state.y.max()) if len(state) else (0, 0) for state in layout_states], dtype = float).reshape(-1, 2)
+    corner_x, corner_y = pack_rectangles(high[:, 0] - low[:, 0], high[:, 1] - low[:, 1], gap, aspect = width / height)
+    offsets = np.column_stack((corner_x, corner_y)) - low
+    total_low = (low + offsets).min(axis = 0)
+    total_high = (high + offsets).max(axis = 0)
+    offsets -= (total_low + total_high) / 2
+    extent = np.maximum(total_high - total_low, 1e-300)
+    return offsets, min(1, width / extent[0], height / extent[1])
+
+def merge_layouts(layout_states, offsets, scale = 1):
+    """
+    input: a LayoutState per component and the offsets and scale of pack_layouts
+    output: one LayoutState with the moved and scaled positions of all components
+    """
+    node_ids = [id for state in layout_states for id in state.node_ids]
+    x = np.concatenate([(state.x + offset[0]) * scale for state, offset in zip(layout_states, offsets)])
+    y = np.concatenate([(state.y + offset[1]) * scale for state, offset in zip(layout_states, offsets)])
+    return LayoutState(node_ids, x, y)
+
+def create_component_layout(layout, width, height, adjacency_dict, initial_coords = None, processes = None, seed = None, **settings):
+    """
+    input: a layout function that is called like layout(width, height, adjacency_dict = ..., initial_coords = ..., **settings), the width
+    and height of the layout area, an adjacency dict (or AdjacencyView), optionally the coordinates to start from, the number of worker
+    processes and the seed of layout_components and the other settings of layout
+    output: LayoutState with the seed, where every connected component is laid out on its own (see layout_components) and the components are packed
+    together (see pack_layouts), so no repulsion is computed between components. a graph of one component goes straight to layout and
+    isolated nodes are not laid out at all. a component starts from its part of initial_coords, centered and scaled down to fit its area
+    """
+    if initial_coords is not None:
+        settings["initial_coords"] = initial_coords
+    seed, rng = layout_rng(seed)
+    components = connected_components(adjacency_dict)
+    if len(components) < 2:
+        layout_state = LayoutState.from_coordinates(layout_of_component(layout, width, height, {"adjacency_dict": adjacency_dict}, settings, seed))
+        layout_state.seed = seed
+        return layout_state
+
+    laid_out = [component for component in components if len(component) > 1]
+    isolated = [component for component in components if len(component) == 1]
+    sizes = [len(component) for component in laid_out]
+    arguments = [{"adjacency_dict": component_adjacency(adjacency_dict, component)} for component in laid_out]
+    if initial_coords is not None:
+        del settings["initial_coords"]
+        initial = LayoutState.from_coordinates(initial_coords)
+        for component, component_arguments, share in zip(laid_out, arguments, component_shares(sizes)):
+            columns = initial.indices(component)
+            positions = np.column_stack((initial.x[columns], initial.y[columns]))
+            low = positions.min(axis = 0)
+            high = positions.max(axis = 0)
+            extent = np.maximum(high - low, 1e-300)
+            positions = (positions - (high + low) / 2) * min(1, width * share / extent[0], height * share / extent[1])
+            component_arguments["initial_coords"] = LayoutState(component, positions[:, 0], positions[:, 1])
+
+    results = layout_components(layout, width, height, arguments, sizes, processes = processes, seed = rng, **settings)
+    layout_states = [LayoutState.from_coordinates(result) for result in results] + [LayoutState(component) for component in isolated]
+    offsets, scale = pack_layouts(layout_states, width, height)
+    if printing_mode:
+        print("laid out", len(laid_out), "connected components and", len(isolated), "isolated nodes on their own")
+    layout_state = merge_layouts(layout_states, offsets, scale)
+    layout_state.seed = seed
+    return layout_state
+
+def create_radial_forest_coordinates(width, height, node_list, node_radius, processes = None):
+    """
+    input: like create_radial_coordinates, but node_list may hold several trees (see split_forest), like the searches of the window give for a disconnected graph
+    output: LayoutState with a radial layout of every tree, packed together like create_component_layout
+    """
+    trees = split_forest(node_list)
+    if len(trees) < 2:
+        return LayoutState.from_coordinates(create_radial_coordinates(width, height, node_list, node_radius))
+    trees.sort(key = len, reverse = True)
+    results = layout_components(create_radial_coordinates, width, height, [{"node_list": tree} for tree in trees], [len(tree) for tree in trees],
+                                processes = processes, node_radius = node_radius)
+    layout_states = [LayoutState.from_coordinates(result) for result in results]
+    offsets, scale = pack_layouts(layout_states, width, height)
+    return merge_layouts(layout_states, offsets, scale)
+
+def calc_component_DAG(width, height, dfs_trees, adjacency_dict, **settings):
+    """
+    input: like calc_DAG, with one dfs tree for every connected component
+    output: the coordinates and edge waypoints of calc_DAG on every tree and its part of the adjacency on its own, packed together like
+    create_component_layout in the area of calc_DAG. the waypoints are Qt points, so the components are laid out in this process
+    """
+    if len(dfs_trees) < 2:
+        return calc_DAG(width, height, dfs_trees, adjacency_dict, **settings)
+    trees = sorted(dfs_trees, key = len, reverse = True)
+    arguments = [{"dfs_trees": [tree], "adjacency_dict": component_adjacency(adjacency_dict, [child for parent, child in tree])} for tree in trees]
+    results = layout_components(calc_DAG, width, height, arguments, [len(tree) for tree in trees], processes = 1, **settings)
+    layout_states = [LayoutState.from_coordinates(coordinates) for coordinates, edge_waypoints in results]
+    offsets, scale = pack_layouts(layout_states, width, height)
+    offsets += (width / 2 / scale, height / 2 / scale)         # calc_DAG lays out in the area from 0 to width and height, not around 0
+
+    # the waypoints are in the coordinates of their component, they move along with it
+    edge_waypoints = {}
+    for (coordinates, component_waypoints), (offset_x, offset_y) in zip(results, offsets.tolist()):
+        for edge, waypoints in component_waypoints.items():
+            edge_waypoints[edge] = [QPointF((point.x() + offset_x) * scale, (point.y() + offset_y) * scale) for point in waypoints]
+    return merge_layouts(layout_states, offsets, scale), edge_waypoints
+
+if __name__ == "__main__":
+    # parse (and cache) a batch of dot files in parallel: python main.py "data/*.dot"
+    import argparse
+
+    parser = argparse.ArgumentParser(description = "load and cache dot files in parallel")
+    parser.add_argument("paths", nargs = "*", default = ["data/*.dot"], help = "dot files or glob patterns")
+    parser.add_argument("--processes", type = int, default = None, help = "number of worker processes (default: one per core)")
+    parser.add_argument("--no-cache", action = "store_true", help = "parse every file, even when it is cached")
+    parser.add_argument("--parser", default = "stream", choices = ["stream", "pydot"], help = "dot reader to use")
+    args = parser.parse_args()
+
+    paths = [path for pattern in args.paths for path in sorted(glob.glob(pattern))]
+    start = time.perf_counter()
+    graphs = load_graphs(paths, use_cache = not args.no_cache, parser = args.parser, processes = args.processes)
+    for path, graph in graphs.items():
+        print(f"  {path:<50} {len(graph.node_ids):7} nodes {len(graph.edge_src):8} edges {len(graph.cluster_names):4} subgraphs")
+    print(f"loaded {len(graphs)} graphs in {time.perf_counter() - start:.2f} s")